@@ -2,20 +2,47 @@
 from django.contrib import admin
 
 from .models import Category, Location, Post
+from .paginators import EstimatedCountPaginator
+from .search import search_posts
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Режим админки для больших таблиц: без точного COUNT(*)
+    всей таблицы на каждой странице списка."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
-    search_fields = ('title', 'text', 'pub_date',
-                     'author__last_name', 'location__name',
-                     'category__title')
+class PostAdmin(LargeTableAdmin):
+    list_display = ('title', 'author', 'category', 'pub_date',
+                    'is_published')
+    # Автор и категория берутся JOIN-ом, а не запросом на строку.
+    list_select_related = ('author', 'category')
+    # Ищется по полнотекстовому индексу (blog.search), а не LIKE
+    # по полям с JOIN-ами. Категория и место - фильтрами, дата -
+    # по date_hierarchy, автор - точным ?author=<id>.
+    search_fields = ('title', 'text')
+    list_filter = ('is_published', 'category', 'location')
+    date_hierarchy = 'pub_date'
+    # Вместо <select> со всеми пользователями, категориями и локациями.
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('category', 'location')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search_posts(queryset, search_term), False
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(LargeTableAdmin):
+    list_display = ('title', 'slug', 'is_published')
     search_fields = ('title',)
 
 
 @admin.register(Location)
-class LocationAdmin(admin.ModelAdmin):
+class LocationAdmin(LargeTableAdmin):
+    list_display = ('name', 'is_published')
     search_fields = ('name',)
@@ -0,0 +1,93 @@
+import time
+from hashlib import md5
+
+from django.core.cache import cache
+from django.utils import timezone
+
+FEED = 'feed'
+PAGES = 'pages'
+NEXT_PUBLICATION_KEY = 'blog:pages:next_publication'
+
+
+def _generation_key(name: str) -> str:
+    return f'blog:generation:{name}'
+
+
+def generation(name: str) -> int:
+    """
+    Текущее поколение именованного набора закешированных данных.
+    Поколение входит в ключи кеша, поэтому его смена разом делает
+    недействительными все ключи набора без перебора и удаления."""
+    key = _generation_key(name)
+    value = cache.get(key)
+    if value is None:
+        # Стартуем с метки времени, а не с единицы: если ключ поколения
+        # вытеснили из кеша, новое значение не совпадет со старыми.
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump_generation(name: str) -> None:
+    """
+    Переводит набор закешированных данных на новое поколение."""
+    key = _generation_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def schedule_next_publication() -> None:
+    """
+    Запоминает ближайший момент публикации отложенного поста:
+    в этот момент закешированные страницы должны устареть.
+    False в кеше - «отложенных постов нет», в отличие от None -
+    «еще не считали»."""
+    from .models import Post
+
+    next_pub_date = Post.objects.filter(
+        is_published=True, pub_date__gt=timezone.now()
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
+    cache.set(NEXT_PUBLICATION_KEY, next_pub_date or False, None)
+
+
+def invalidate_pages() -> None:
+    """
+    Сбрасывает все закешированные страницы для анонимов."""
+    bump_generation(PAGES)
+    schedule_next_publication()
+
+
+def check_scheduled_publications() -> None:
+    """
+    Если с прошлой проверки наступило время публикации отложенного
+    поста, меняет поколения счетчиков лент и страниц. Это и есть
+    «таймер» на ближайший pub_date: без фоновых потоков, одним
+    чтением из кеша на запрос."""
+    next_pub_date = cache.get(NEXT_PUBLICATION_KEY)
+    if next_pub_date is None:
+        schedule_next_publication()
+    elif next_pub_date and next_pub_date <= timezone.now():
+        bump_generation(FEED)
+        invalidate_pages()
+
+
+def feed_generation() -> int:
+    """
+    Поколение закешированных счетчиков лент."""
+    check_scheduled_publications()
+    return generation(FEED)
+
+
+def pages_generation() -> int:
+    """
+    Поколение кеша страниц для анонимов."""
+    check_scheduled_publications()
+    return generation(PAGES)
+
+
+def page_cache_key(view_name: str, kwargs: dict, query: str) -> str:
+    raw = f'{view_name}:{sorted(kwargs.items())}:{query}'
+    digest = md5(raw.encode('utf-8')).hexdigest()
+    return f'blog:page:{pages_generation()}:{digest}'
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Бэкенды, у которых кеш свой у каждого процесса.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Поколения кеша страниц и счетчиков лент (blog.cache) хранятся
+    в самом кеше. Если он у каждого процесса свой, пост, сохраненный
+    в одном воркере, не сбросит страницы, закешированные другими:
+    они устареют только через PAGE_CACHE_TIMEOUT."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f'Кеш по умолчанию ({backend}) свой у каждого процесса.',
+        hint='Кеш страниц для анонимов сбрасывается только в том '
+             'процессе, где сохранили пост. Если воркеров несколько, '
+             'нужен общий кеш (Memcached, Redis).',
+        id='blog.W001',
+    )]
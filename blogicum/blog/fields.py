@@ -0,0 +1,59 @@
+from django.db import models
+from django.db.models.fields.files import FileDescriptor
+
+from .images import read_metadata
+
+
+class MetadataImageFileDescriptor(FileDescriptor):
+    """
+    Как ImageFileDescriptor, но повторное присваивание того же
+    файла (так ModelForm сохраняет пост без новой картинки)
+    метаданные не пересчитывает."""
+
+    def __set__(self, instance, value):
+        previous_file = instance.__dict__.get(self.field.attname)
+        super().__set__(instance, value)
+        if previous_file is not None and value is not previous_file:
+            self.field.update_dimension_fields(instance, force=True)
+
+
+class ImageField(models.ImageField):
+    """
+    models.ImageField, который кладет в поля модели не только ширину
+    и высоту картинки (width_field, height_field), но и ее вес
+    (bytes_field) и MIME-тип (mime_field) - читая только заголовок.
+    В отличие от ImageField, у загруженной из БД модели файл
+    не открывает никогда: поля заполняются, только когда файл
+    присвоили, а для старых записей - командой
+    backfill_image_metadata."""
+    descriptor_class = MetadataImageFileDescriptor
+
+    def __init__(self, *args, bytes_field=None, mime_field=None, **kwargs):
+        self.bytes_field = bytes_field
+        self.mime_field = mime_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.bytes_field:
+            kwargs['bytes_field'] = self.bytes_field
+        if self.mime_field:
+            kwargs['mime_field'] = self.mime_field
+        return name, path, args, kwargs
+
+    def update_dimension_fields(self, instance, force=False, *args, **kwargs):
+        file = getattr(instance, self.attname)
+        # Без force зовется из post_init: новый, еще не сохраненный файл
+        # (Post(image=...)) смотрим, файл из БД - нет.
+        if not force and (not file or file._committed):
+            return
+        metadata = read_metadata(file) if file else {}
+        for field_name, key in (
+                (self.width_field, 'width'),
+                (self.height_field, 'height'),
+                (self.bytes_field, 'bytes'),
+                (self.mime_field, 'mime'),
+        ):
+            if field_name:
+                setattr(instance, field_name, metadata.get(
+                    key, '' if key == 'mime' else None))
@@ -38,7 +38,18 @@ class PostForm(forms.ModelForm):
     """
     Форма для вставки поста.
     Почти все поля, кроме автора.
-    (Его потом подтянем автоматически.)"""
+    (Его потом подтянем автоматически.)
+    upload_errors - почему обработчик загрузки
+    отбросил файлы (см. blog.uploads)."""
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean_image(self):
+        if 'image' in self.upload_errors:
+            raise forms.ValidationError(self.upload_errors['image'])
+        return self.cleaned_data['image']
+
     class Meta:
         model = Post
         fields = ('title',
@@ -0,0 +1,110 @@
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Ширины уменьшенных копий картинок постов и форматы, в которых они
+# сохраняются: (расширение, формат Pillow, MIME-тип).
+VARIANT_WIDTHS = (320, 640, 1024)
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', 'image/webp'),
+    ('jpg', 'JPEG', 'image/jpeg'),
+)
+VARIANT_QUALITY = 80
+# Значения тега Orientation в EXIF, при которых картинка лежит на боку.
+EXIF_ORIENTATION = 0x0112
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def variant_name(name: str, width: int, extension: str) -> str:
+    """
+    Путь уменьшенной копии: рядом с оригиналом, в variants/<имя файла>/.
+    По такому пути всегда можно понять, от какого оригинала копия."""
+    directory, filename = posixpath.split(name)
+    return posixpath.join(
+        directory, 'variants', filename, f'{width}w.{extension}')
+
+
+def variant_source(name: str):
+    """
+    Обратная операция к variant_name: путь оригинала по пути копии,
+    None - если это не копия."""
+    variant_dir = posixpath.dirname(name)
+    variants_dir, filename = posixpath.split(variant_dir)
+    directory, marker = posixpath.split(variants_dir)
+    if marker != 'variants':
+        return None
+    return posixpath.join(directory, filename)
+
+
+def read_metadata(image_file) -> dict:
+    """
+    Размеры (с учетом поворота из EXIF), вес и MIME-тип картинки.
+    Pillow читает только заголовок файла, пиксели не декодируются."""
+    file = image_file.file
+    position = file.tell()
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+            if image.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+                width, height = height, width
+            mime = Image.MIME.get(image.format, '')
+    finally:
+        file.seek(position)
+    return {
+        'width': width,
+        'height': height,
+        'bytes': image_file.size,
+        'mime': mime,
+    }
+
+
+def _encode(image: Image.Image, pil_format: str) -> bytes:
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, pil_format, quality=VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def generate_variants(image_file) -> dict:
+    """
+    Делает уменьшенные копии картинки из ImageField во всех ширинах
+    из VARIANT_WIDTHS, которые меньше оригинала (или одну копию
+    в ширину оригинала, если он совсем маленький), и во всех форматах.
+    Возвращает описание для Post.image_variants."""
+    storage = image_file.storage
+    with storage.open(image_file.name) as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    widths = [width for width in VARIANT_WIDTHS if width < image.width]
+    variants = []
+    for width in widths or [image.width]:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for extension, pil_format, mime in VARIANT_FORMATS:
+            name = variant_name(image_file.name, width, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(
+                name, ContentFile(_encode(resized, pil_format)))
+            variants.append({
+                'path': name,
+                'width': width,
+                'height': height,
+                'mime': mime,
+            })
+    return {'source': image_file.name, 'variants': variants}
+
+
+def delete_with_variants(storage, name: str) -> None:
+    """
+    Удаляет картинку и все ее уменьшенные копии."""
+    variants_dir = posixpath.dirname(variant_name(name, 0, ''))
+    if storage.exists(variants_dir):
+        for filename in storage.listdir(variants_dir)[1]:
+            storage.delete(posixpath.join(variants_dir, filename))
+        storage.delete(variants_dir)
+    storage.delete(name)
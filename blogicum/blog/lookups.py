@@ -0,0 +1,52 @@
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import bump_generation, generation
+
+
+class LookupTable:
+    """
+    Копия маленькой, редко меняющейся таблицы в памяти процесса:
+    {pk: объект}. Версия копии - поколение в кеше Django: сигнал
+    о правке сразу сбрасывает копию своего процесса, а при общем
+    для процессов кеше (Memcached, Redis) - и всех остальных.
+    С LocMemCache кеш у каждого процесса свой, поэтому копия
+    вдобавок перечитывается не реже раза в LOOKUP_MAX_AGE секунд:
+    дольше правка из другого процесса не видна."""
+
+    def __init__(self, model_label: str):
+        self.model_label = model_label
+        self._state = (None, float('-inf'), {})
+
+    @property
+    def _generation_name(self) -> str:
+        return f'lookup:{self.model_label}'
+
+    def objects(self) -> dict:
+        version = generation(self._generation_name)
+        loaded_version, loaded_at, objects = self._state
+        now = time.monotonic()
+        if (loaded_version != version
+                or now - loaded_at >= settings.LOOKUP_MAX_AGE):
+            model = apps.get_model(self.model_label)
+            # С основной базы: копия живет долго, и отставание
+            # реплики застряло бы в ней до следующего сброса.
+            objects = {obj.pk: obj for obj in
+                       model.objects.using(DEFAULT_DB_ALIAS)}
+            # Кортеж присваивается целиком - другие потоки увидят
+            # либо старую, либо новую копию, но не смесь.
+            self._state = (version, now, objects)
+        return objects
+
+    def get(self, pk):
+        return self.objects().get(pk)
+
+    def invalidate(self) -> None:
+        bump_generation(self._generation_name)
+
+
+categories = LookupTable('blog.Category')
+locations = LookupTable('blog.Location')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import read_metadata
+from blog.models import Post
+
+METADATA_FIELDS = ('image_width', 'image_height', 'image_bytes', 'image_mime')
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, вес и MIME-тип картинок постов, '
+            'у которых их нет. Читаются только заголовки файлов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Перечитать метаданные у всех постов с картинками.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько постов читать из БД и обновлять за раз.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('id', 'image')
+        if not options['force']:
+            posts = posts.filter(image_width__isnull=True)
+        done = failed = last_id = 0
+        while True:
+            chunk = list(posts.filter(id__gt=last_id).order_by('id')[
+                :options['chunk_size']])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            updated = []
+            for post in chunk:
+                try:
+                    metadata = read_metadata(post.image)
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'Пост {post.id}: {error}')
+                    continue
+                finally:
+                    post.image.close()
+                for field_name in METADATA_FIELDS:
+                    setattr(post, field_name,
+                            metadata[field_name[len('image_'):]])
+                updated.append(post)
+            Post.objects.bulk_update(updated, METADATA_FIELDS)
+            done += len(updated)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово постов: {done}, с ошибками: {failed}'))
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from blog.models import Comment, Post
+from blog.views import PAGINATE_BY_THIS, timeline_selected
+from core.db import apply_pragmas
+
+# Как SQLite работает по умолчанию (без core.db).
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'mmap_size': 0,
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT',
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность чтения главной ленты '
+            'при одновременной записи каментов: с PRAGMA SQLite '
+            'по умолчанию и с SQLITE_PRAGMAS. Работает на временной '
+            'копии базы, саму базу не трогает.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Сколько потоков читают ленту.')
+        parser.add_argument(
+            '--writers', type=int, default=1,
+            help='Сколько потоков пишут каменты.')
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Сколько секунд длится каждый замер.')
+
+    def handle(self, *args, **options):
+        post_id, author_id = Post.objects.order_by('-pub_date').values_list(
+            'id', 'author_id').first() or (None, None)
+        if post_id is None:
+            raise CommandError('В базе нет постов - нечего читать.')
+        self.queries = self.prepare_queries(post_id, author_id)
+        for title, pragmas in (
+                ('PRAGMA по умолчанию', DEFAULT_PRAGMAS),
+                ('SQLITE_PRAGMAS', {
+                    'journal_mode': settings.SQLITE_JOURNAL_MODE,
+                    **settings.SQLITE_PRAGMAS}),
+        ):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                self.copy_database(path)
+                reads, writes, errors = self.measure(path, pragmas, options)
+            duration = options['duration']
+            self.stdout.write(
+                f'{title}: лента {reads / duration:.0f} стр/с, '
+                f'каменты {writes / duration:.0f} в с, '
+                f'ошибок блокировки {errors}')
+
+    def prepare_queries(self, post_id, author_id) -> dict:
+        """
+        SQL тех же запросов, что делает главная страница, и записи
+        камента вместе с обновлением счетчика поста."""
+        page_sql, page_params = timeline_selected().values_list(
+            'post_id', flat=True)[:PAGINATE_BY_THIS].query.sql_with_params()
+        posts_sql, _ = Post.objects.select_related('author').filter(
+            pk__in=range(PAGINATE_BY_THIS)).query.sql_with_params()
+        comment = Comment._meta
+        # Django пишет параметры как %s, модуль sqlite3 ждет «?».
+        return {
+            'page': (page_sql.replace('%s', '?'), page_params),
+            'posts': posts_sql.replace('%s', '?'),
+            'comment': (
+                f'INSERT INTO {comment.db_table} '
+                f'(text, author_id, post_id, created_at) '
+                f'VALUES (?, ?, ?, ?)'),
+            'count': (
+                f'UPDATE {Post._meta.db_table} '
+                f'SET comment_count = comment_count + 1 WHERE id = ?'),
+            'post_id': post_id,
+            'author_id': author_id,
+        }
+
+    def copy_database(self, path: str) -> None:
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def measure(self, path: str, pragmas: dict, options) -> tuple:
+        setup = sqlite3.connect(path)
+        apply_pragmas(setup, pragmas)
+        setup.close()
+        counters = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def run(operation):
+            db = sqlite3.connect(path, isolation_level=None)
+            apply_pragmas(db, {
+                name: value for name, value in pragmas.items()
+                if name != 'journal_mode'})
+            done = errors = 0
+            while time.monotonic() < deadline:
+                try:
+                    operation(db)
+                    done += 1
+                except sqlite3.OperationalError:
+                    errors += 1
+            db.close()
+            key = 'reads' if operation == self.read_feed else 'writes'
+            with lock:
+                counters[key] += done
+                counters['errors'] += errors
+
+        threads = [
+            threading.Thread(target=run, args=(self.read_feed,))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=run, args=(self.write_comment,))
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counters['reads'], counters['writes'], counters['errors']
+
+    def read_feed(self, db) -> None:
+        page_sql, page_params = self.queries['page']
+        ids = [row[0] for row in db.execute(page_sql, page_params)]
+        ids += [0] * (PAGINATE_BY_THIS - len(ids))
+        db.execute(self.queries['posts'], ids).fetchall()
+
+    def write_comment(self, db) -> None:
+        created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute(self.queries['comment'], (
+                'Камент для замера', self.queries['author_id'],
+                self.queries['post_id'], created_at))
+            db.execute(self.queries['count'], (self.queries['post_id'],))
+        except sqlite3.Error:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
@@ -0,0 +1,40 @@
+import gzip
+
+from django.core.management.base import BaseCommand
+
+from blog.transfer import export_lines
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, категории, локации, посты '
+            'и каменты в JSON Lines (объект на строку) потоком, '
+            'не держа всю базу в памяти. Файл .gz сжимается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help='Куда писать; - (по умолчанию) - в stdout.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько объектов читать из БД за раз.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if output == '-':
+            # Поток под OutputWrapper: строки пишутся как есть, и
+            # call_command(stdout=...) их перехватывает.
+            stream = self.stdout._out
+        elif output.endswith('.gz'):
+            stream = gzip.open(output, 'wt', encoding='utf-8')
+        else:
+            stream = open(output, 'w', encoding='utf-8')
+        written = 0
+        try:
+            for line in export_lines(options['chunk_size']):
+                stream.write(line + '\n')
+                written += 1
+        finally:
+            if stream is not self.stdout._out:
+                stream.close()
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено объектов: {written}'))
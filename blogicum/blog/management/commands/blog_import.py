@@ -0,0 +1,44 @@
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import DatabaseError
+
+from blog.transfer import import_lines, rebuild_derived
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку blog_export: читает файл построчно '
+            'и сохраняет объекты пачками INSERT в одной '
+            'транзакции, затем пересчитывает ленту и счетчики '
+            'каментов. Вместо loaddata для больших выгрузок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', nargs='?', default='-',
+            help='Откуда читать; - (по умолчанию) - из stdin.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько объектов разбирать и сохранять за раз.')
+
+    def handle(self, *args, **options):
+        source = options['input']
+        if source == '-':
+            stream = sys.stdin
+        elif source.endswith('.gz'):
+            stream = gzip.open(source, 'rt', encoding='utf-8')
+        else:
+            stream = open(source, encoding='utf-8')
+        try:
+            counts = import_lines(stream, options['chunk_size'])
+        except (DatabaseError, DeserializationError, ValueError) as error:
+            raise CommandError(f'Выгрузка не загружена: {error}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        rebuild_derived()
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {sum(counts.values())}'))
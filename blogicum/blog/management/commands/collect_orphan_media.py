@@ -0,0 +1,118 @@
+import os
+import posixpath
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from blog.images import variant_source
+from blog.models import Post
+
+
+def scan_files(root: str):
+    """
+    Все файлы под root, по одному: os.scandir без списков каталогов
+    целиком, так что память не зависит от числа файлов."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+class Command(BaseCommand):
+    help = ('Удаляет (или переносит в карантин) файлы картинок постов '
+            'и их уменьшенных копий, на которые не ссылается ни один пост.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только перечислить ненужные файлы, ничего не трогая.')
+        parser.add_argument(
+            '--quarantine', metavar='DIR',
+            help='Не удалять, а переносить файлы в этот каталог, '
+                 'сохраняя пути относительно MEDIA_ROOT.')
+        parser.add_argument(
+            '--min-age', type=float, default=settings.ORPHAN_MEDIA_MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд: пост, который '
+                 'на них сошлется, может быть еще не сохранен.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько файлов сверять с БД одним запросом.')
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        self.location = field.storage.location
+        self.options = options
+        self.found = self.size = 0
+        self.root = os.path.normpath(
+            os.path.join(self.location, field.upload_to))
+        if not os.path.isdir(self.root):
+            return
+        newer_than = time.time() - options['min_age']
+        batch = []
+        for entry in scan_files(self.root):
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > newer_than:
+                continue
+            batch.append((entry.path, stat.st_size))
+            if len(batch) >= options['batch_size']:
+                self.process(batch)
+                batch = []
+        if batch:
+            self.process(batch)
+
+        if options['dry_run']:
+            action = 'Найдено'
+        elif options['quarantine']:
+            action = 'Перенесено в карантин'
+        else:
+            action = 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} файлов: {self.found}, {filesizeformat(self.size)}'))
+
+    def name(self, path: str) -> str:
+        return posixpath.join(
+            *os.path.relpath(path, self.location).split(os.sep))
+
+    def process(self, batch: list) -> None:
+        """
+        Сверяет пачку файлов с БД одним запросом по индексу Post.image.
+        Уменьшенная копия нужна, пока нужен ее оригинал."""
+        sources = {
+            path: variant_source(self.name(path)) or self.name(path)
+            for path, _ in batch
+        }
+        referenced = set(Post.objects.filter(
+            image__in=set(sources.values())
+        ).values_list('image', flat=True))
+        for path, size in batch:
+            if sources[path] in referenced:
+                continue
+            self.found += 1
+            self.size += size
+            if self.options['dry_run']:
+                self.stdout.write(self.name(path))
+                continue
+            if self.options['quarantine']:
+                target = os.path.join(
+                    self.options['quarantine'], self.name(path))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+            self.remove_empty_parents(os.path.dirname(path))
+
+    def remove_empty_parents(self, directory: str) -> None:
+        # Каталоги хешей и копий пустеют вместе с последним файлом.
+        while directory != self.root:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
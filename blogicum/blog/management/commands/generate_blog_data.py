@@ -0,0 +1,254 @@
+import random
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.models import Category, Comment, Location, Post, User
+from blog.search import drop_search_index, ensure_search_index
+from blog.transfer import chunks, rebuild_derived
+from core.db import apply_pragmas
+
+WORDS = (
+    'утро', 'кофе', 'город', 'дорога', 'море', 'горы', 'книга', 'кот',
+    'дождь', 'солнце', 'поезд', 'работа', 'отпуск', 'друзья', 'вечер',
+    'музыка', 'рецепт', 'пирог', 'прогулка', 'парк', 'снег', 'лес',
+    'река', 'мост', 'фото', 'история', 'новость', 'идея', 'план', 'день',
+    'неделя', 'выходные', 'рынок', 'чай', 'велосипед', 'письмо',
+    'встреча', 'праздник', 'сад', 'окно',
+)
+COMMENT_MAX_LENGTH = 150
+# Сколько разных заголовков и текстов готовится заранее: собирать
+# текст из слов для каждой из миллионов строк дольше самой вставки.
+TEXT_POOL_SIZE = 5000
+
+
+def anchor_time(value: str) -> datetime:
+    """
+    Разбирает --now: дата и время ISO 8601, без зоны - UTC."""
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+def start_of_day() -> datetime:
+    return timezone.now().astimezone(dt_timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, категориями, '
+            'локациями, постами и каментами для проверки на объемах. '
+            'Пишет пачками, транзакция на пачку; при одном и том же '
+            '--seed, --now и той же исходной базе данные одинаковые. '
+            'В конце пересчитывает ленту, счетчики каментов '
+            'и поисковый индекс.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--unpublished', type=float, default=0.05,
+            help='Доля снятых с публикации постов.')
+        parser.add_argument(
+            '--scheduled', type=float, default=0.02,
+            help='Доля отложенных постов (дата публикации в будущем).')
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько прошедших дней разбросаны даты публикации.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--now', type=anchor_time, default=None,
+            help='От какого момента отсчитываются даты (ISO 8601, без '
+                 'зоны - UTC); по умолчанию - начало текущих суток UTC.')
+        parser.add_argument(
+            '--batch-size', type=int, default=20000,
+            help='Сколько строк вставлять одной транзакцией.')
+        parser.add_argument(
+            '--password', default='password',
+            help='Пароль всех созданных пользователей.')
+
+    def handle(self, *args, **options):
+        unpublished, scheduled = options['unpublished'], options['scheduled']
+        if not (0 <= unpublished <= 1 and 0 <= scheduled <= 1):
+            raise CommandError(
+                'Доли --unpublished и --scheduled должны быть от 0 до 1.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Даты считаются от --now, а не от текущего времени: иначе
+        # при том же --seed получались бы разные наборы данных.
+        self.now = options['now'] or start_of_day()
+        titles = self.pool(2, 6)
+        post_texts = self.pool(20, 80)
+        comment_texts = [text[:COMMENT_MAX_LENGTH]
+                         for text in self.pool(3, 20)]
+
+        # Хеш пароля считается один раз: на каждого пользователя
+        # это были бы сотни миллисекунд PBKDF2.
+        password = make_password(options['password'])
+        # Без fsync на каждую пачку: при сбое данные проще сгенерировать
+        # заново. Соединение закрывается вместе с командой; внутри
+        # транзакции SQLite эту настройку менять не дает.
+        if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+            with connection.cursor() as cursor:
+                apply_pragmas(cursor, {'synchronous': 'OFF'})
+        self.create(User, options['users'], lambda pk: User(
+            id=pk, username=f'user{pk}', password=password,
+            email=f'user{pk}@example.com'))
+        self.create(Category, options['categories'], lambda pk: Category(
+            id=pk, title=f'Категория {pk}', slug=f'category-{pk}',
+            description=self.words(10, 30)))
+        self.create(Location, options['locations'], lambda pk: Location(
+            id=pk, name=f'Место {pk}'))
+
+        if options['posts']:
+            author_ids = self.ids(User)
+            category_ids = self.ids(Category)
+            location_ids = self.ids(Location) + [None]
+            if not author_ids or not category_ids:
+                raise CommandError(
+                    'Для постов нужны хотя бы один пользователь '
+                    'и одна категория.')
+            pub_date_field = Post._meta.get_field('pub_date')
+            # Поисковый индекс дешевле перестроить в конце целиком,
+            # чем обновлять триггером на каждую вставку. Вернуть его
+            # нужно и при ошибке: без него поиск отвечает 500.
+            drop_search_index(connection)
+            try:
+                self.insert(
+                    Post, options['posts'],
+                    ('title', 'text', 'pub_date', 'is_published', 'author',
+                     'category', 'location'),
+                    lambda: (
+                        self.rng.choice(titles),
+                        self.rng.choice(post_texts),
+                        pub_date_field.get_db_prep_save(
+                            self.pub_date(scheduled, options['days']),
+                            connection),
+                        self.rng.random() >= unpublished,
+                        self.rng.choice(author_ids),
+                        self.rng.choice(category_ids),
+                        self.rng.choice(location_ids),
+                    ))
+            finally:
+                ensure_search_index(connection)
+        if options['comments']:
+            author_ids = self.ids(User)
+            # Даты публикации - числами в array: на миллионах постов
+            # список datetime занял бы в разы больше памяти. Отложенные
+            # посты никто еще не видел - каментов к ним нет.
+            post_ids, pub_times = [], array('d')
+            for pk, pub_date in Post.objects.filter(
+                    pub_date__lte=self.now).order_by('pk').values_list(
+                    'pk', 'pub_date').iterator(chunk_size=self.batch_size):
+                post_ids.append(pk)
+                pub_times.append(pub_date.timestamp())
+            if not author_ids or not post_ids:
+                raise CommandError(
+                    'Для каментов нужны хотя бы один пользователь '
+                    'и один опубликованный к --now пост.')
+            created_at_field = Comment._meta.get_field('created_at')
+
+            def comment():
+                index = self.rng.randrange(len(post_ids))
+                return (
+                    self.rng.choice(author_ids),
+                    post_ids[index],
+                    self.rng.choice(comment_texts),
+                    created_at_field.get_db_prep_save(
+                        self.comment_date(pub_times[index]), connection),
+                )
+
+            self.insert(
+                Comment, options['comments'],
+                ('author', 'post', 'text', 'created_at'), comment)
+
+        rebuild_derived()
+        self.stdout.write(self.style.SUCCESS(
+            'Готово: лента и счетчики каментов пересчитаны.'))
+
+    def words(self, least: int, most: int) -> str:
+        return ' '.join(self.rng.choices(
+            WORDS, k=self.rng.randint(least, most))).capitalize()
+
+    def pool(self, least: int, most: int) -> list:
+        return [self.words(least, most) for _ in range(TEXT_POOL_SIZE)]
+
+    def ids(self, model) -> list:
+        return list(model.objects.order_by('pk').values_list('pk', flat=True))
+
+    def pub_date(self, scheduled, days):
+        """
+        Дата публикации: в прошлом или, с долей scheduled, в будущем.
+        Будущее - не раньше чем через сутки: при --now по умолчанию
+        (начало суток) отложенные посты остаются отложенными весь день."""
+        if self.rng.random() < scheduled:
+            return self.now + timedelta(
+                seconds=self.rng.uniform(86400, 30 * 86400))
+        return self.now - timedelta(
+            seconds=self.rng.uniform(0, days * 86400))
+
+    def comment_date(self, pub_time: float) -> datetime:
+        """
+        Время камента: между публикацией поста и --now."""
+        span = max(self.now.timestamp() - pub_time, 0)
+        return datetime.fromtimestamp(
+            pub_time + self.rng.uniform(0, span), tz=dt_timezone.utc)
+
+    def first_pk(self, model) -> int:
+        return (model.objects.aggregate(
+            max_pk=Max('pk'))['max_pk'] or 0) + 1
+
+    def create(self, model, count: int, make) -> None:
+        """
+        Создает count объектов model пачками bulk_create; первичные
+        ключи задаются явно, следом за наибольшим в таблице: SQLite
+        не возвращает id из bulk_create, а по ним на объекты ссылаются
+        следующие. Для небольших таблиц-справочников."""
+        first_pk = self.first_pk(model)
+        objects = (make(pk) for pk in range(first_pk, first_pk + count))
+        for chunk in chunks(objects, self.batch_size):
+            model.objects.bulk_create(chunk)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+
+    def insert(self, model, count: int, field_names: tuple, make) -> None:
+        """
+        Вставляет count строк model пачками executemany в обход
+        моделей: на миллионах строк bulk_create тратит больше времени
+        на создание объектов и сборку SQL, чем SQLite на вставку.
+        make() возвращает значения полей field_names, уже готовые
+        для БД; остальные поля берутся из нового объекта модели
+        (значения по умолчанию, auto_now_add) один раз на все строки."""
+        prototype = model()
+        fields = [model._meta.get_field(name) for name in field_names]
+        constant_fields = [
+            field for field in model._meta.concrete_fields
+            if field not in fields and not field.primary_key]
+        constants = tuple(
+            field.get_db_prep_save(field.pre_save(prototype, True),
+                                   connection)
+            for field in constant_fields)
+        columns = [model._meta.pk] + fields + constant_fields
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(model._meta.db_table),
+            ', '.join(connection.ops.quote_name(field.column)
+                      for field in columns),
+            ', '.join(['%s'] * len(columns)))
+        first_pk = self.first_pk(model)
+        rows = ((pk, *make(), *constants)
+                for pk in range(first_pk, first_pk + count))
+        for chunk in chunks(rows, self.batch_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, chunk)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
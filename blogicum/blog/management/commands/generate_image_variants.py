@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Делает уменьшенные копии картинок постов, у которых их нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересобрать копии у всех постов с картинками.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько постов читать из БД за раз.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only(
+            'id', 'image', 'image_variants')
+        done = failed = last_id = 0
+        while True:
+            # Пачками по id, а не iterator(): по ходу дела пишем
+            # в ту же таблицу, а SQLite не изолирует от этого курсор.
+            chunk = list(posts.filter(id__gt=last_id).order_by('id')[
+                :options['chunk_size']])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            for post in chunk:
+                if not options['force'] and not post.image_variants_stale:
+                    continue
+                try:
+                    post.refresh_image_variants(force=options['force'])
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'Пост {post.id}: {error}')
+                    continue
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово постов: {done}, с ошибками: {failed}'))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.cache import FEED, bump_generation, invalidate_pages
+from blog.models import Post, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = ('Добавляет в публичную ленту отложенные посты, '
+            'время публикации которых наступило.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя ленту раз в --interval секунд.')
+        parser.add_argument(
+            '--interval', type=float, default=30,
+            help='Пауза между проверками в режиме --loop, секунд.')
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Перед запуском пересобрать ленту целиком.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            total = TimelineEntry.objects.rebuild()
+            self.stdout.write(f'Лента пересобрана, постов: {total}')
+        # Первый проход - полный, он же догоняет пропущенное,
+        # пока команда не работала; дальше - только новое окно времени.
+        since = None
+        while True:
+            now = timezone.now()
+            posts = Post.objects.all()
+            if since is not None:
+                posts = posts.filter(pub_date__gt=since)
+            added = TimelineEntry.objects.add_visible(posts, now=now)
+            if added:
+                bump_generation(FEED)
+                invalidate_pages()
+                self.stdout.write(f'Опубликовано постов: {added}')
+            since = now
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
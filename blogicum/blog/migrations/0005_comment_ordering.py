@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ('created_at', 'id')},
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from blog.models import insert_visible_posts
+
+
+def fill_timeline(apps, schema_editor):
+    insert_visible_posts(apps.get_model('blog', 'Post'),
+                         apps.get_model('blog', 'TimelineEntry'),
+                         schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_comment_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='timeline_entry', serialize=False, to='blog.post')),
+                ('pub_date', models.DateTimeField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.category')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['pub_date', 'post'], name='timeline_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['category', 'pub_date', 'post'], name='timeline_category_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_timeline, migrations.RunPython.noop),
+    ]
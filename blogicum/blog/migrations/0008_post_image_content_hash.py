@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:09
+
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, storage=blog.storage.ContentHashStorage(), upload_to='posts_pics/', verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:16
+
+import blog.fields
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_image_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Размер картинки, байт'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_mime',
+            field=models.CharField(blank=True, editable=False, max_length=50, verbose_name='MIME-тип картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=blog.fields.ImageField(blank=True, bytes_field='image_bytes', db_index=True, height_field='image_height', mime_field='image_mime', storage=blog.storage.ContentHashStorage(), upload_to='posts_pics/', verbose_name='Картинка', width_field='image_width'),
+        ),
+    ]
@@ -1,11 +1,21 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from core.models import PublishedCreatedModel
 
+from .fields import ImageField
+from .images import generate_variants
+from .lookups import categories, locations
+from .storage import ContentHashStorage
+
 
 UPLOAD_DIR = 'posts_pics/'  # А сюда хотим грузить фотки юзеров потом.
+# Поля поста, которые ведутся отдельными UPDATE-ами, а не save().
+POST_SERVICE_FIELDS = ('comment_count', 'image_variants')
+TIMELINE_BATCH_SIZE = 1000
 
 
 class TitleModel(models.Model):
@@ -80,6 +90,56 @@ class Location(PublishedCreatedModel):
             else str(self.name)[:30] + '...'
 
 
+class PostQuerySet(models.QuerySet):
+    """Кверисет постов с сервисными операциями над ними.
+    """
+    _cached_relations = False
+
+    def with_cached_relations(self) -> 'PostQuerySet':
+        """
+        Категория и локация берутся не JOIN-ом, а из таблиц
+        blog.lookups в памяти процесса: из БД читаются только
+        category_id и location_id."""
+        clone = self._chain()
+        clone._cached_relations = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cached_relations = self._cached_relations
+        return clone
+
+    def _fetch_all(self):
+        fetched = self._result_cache is None
+        super()._fetch_all()
+        if fetched and self._cached_relations:
+            category_field = Post._meta.get_field('category')
+            location_field = Post._meta.get_field('location')
+            for post in self._result_cache:
+                if not isinstance(post, Post):
+                    continue
+                # Если объекта в копии нет (создан в обход сигналов),
+                # поле останется ленивым и догрузится обычным запросом.
+                category = categories.get(post.category_id)
+                if category is not None:
+                    category_field.set_cached_value(post, category)
+                location = (None if post.location_id is None
+                            else locations.get(post.location_id))
+                if post.location_id is None or location is not None:
+                    location_field.set_cached_value(post, location)
+
+    def rebuild_comment_counts(self) -> int:
+        """
+        Пересчитывает денормализованный счетчик каментов
+        одним UPDATE по подзапросу; возвращает число обновленных постов."""
+        counts = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(
+            total=Count('pk')
+        ).values('total')
+        return self.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
 class Post(StrModel, PublishedCreatedModel, TitleModel):
     """Класс модели поста (постов).
     """
@@ -113,15 +173,171 @@ class Post(StrModel, PublishedCreatedModel, TitleModel):
         on_delete=models.CASCADE,
         verbose_name='Категория'
     )
-    image = models.ImageField(
+    # Файлы общие для постов с одинаковой картинкой (ContentHashStorage),
+    # индекс - под проверку, остались ли на файл ссылки.
+    image = ImageField(
         'Картинка',
         upload_to=UPLOAD_DIR,
-        blank=True
+        storage=ContentHashStorage(),
+        blank=True,
+        db_index=True,
+        width_field='image_width',
+        height_field='image_height',
+        bytes_field='image_bytes',
+        mime_field='image_mime'
+    )
+    # Заполняются полем image при загрузке картинки, чтобы шаблонам
+    # не приходилось открывать файл ради его размеров.
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    image_bytes = models.PositiveIntegerField(
+        'Размер картинки, байт',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    image_mime = models.CharField(
+        'MIME-тип картинки',
+        max_length=50,
+        blank=True,
+        editable=False
+    )
+    # Счетчик ведется сигналами blog.signals атомарным UPDATE,
+    # поэтому обычный save() его не перезаписывает (POST_SERVICE_FIELDS).
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
+    # {'source': путь оригинала, 'variants': [{'path', 'width',
+    # 'height', 'mime'}, ...]} - см. blog.images.generate_variants().
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии картинки'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        # Под фильтры и сортировку лент из blog/views.py.
+        # is_published=True Django пишет в SQL голым столбцом, а не
+        # равенством, поэтому флаг вынесен в условие частичных индексов:
+        # только так SQLite отдает строки сразу в порядке pub_date.
+        indexes = (
+            models.Index(fields=('pub_date',),
+                         condition=models.Q(is_published=True),
+                         name='post_published_pub_date_idx'),
+            models.Index(fields=('category', 'pub_date'),
+                         condition=models.Q(is_published=True),
+                         name='post_category_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='post_author_pub_date_idx'),
+        )
+
+    @property
+    def image_variants_stale(self) -> bool:
+        """
+        Копии сделаны не для текущей картинки (или картинки больше нет)."""
+        return (self.image.name or '') != self.image_variants.get(
+            'source', '')
+
+    def refresh_image_variants(self, force=False) -> None:
+        """
+        Пересобирает уменьшенные копии картинки и сохраняет
+        их описание отдельным UPDATE, без save() и его сигналов.
+        Если у другого поста та же картинка и копии к ней уже есть,
+        берет их (force - делать копии заново в любом случае)."""
+        if not self.image:
+            self.image_variants = {}
+        else:
+            twin_variants = None if force else Post.objects.filter(
+                image=self.image.name,
+                image_variants__source=self.image.name,
+            ).exclude(pk=self.pk).values_list(
+                'image_variants', flat=True).first()
+            self.image_variants = (
+                twin_variants or generate_variants(self.image))
+        Post.objects.filter(pk=self.pk).update(
+            image_variants=self.image_variants)
+
+    @property
+    def image_srcset(self) -> dict:
+        """
+        Значения srcset по форматам копий: {'webp': 'url 320w, ...'}."""
+        if self.image_variants_stale:
+            return {}
+        srcset = {}
+        for variant in self.image_variants.get('variants', ()):
+            subtype = variant['mime'].split('/')[1]
+            srcset.setdefault(subtype, []).append(
+                f'{self.image.storage.url(variant["path"])} '
+                f'{variant["width"]}w')
+        return {subtype: ', '.join(urls) for subtype, urls in srcset.items()}
+
+    @property
+    def image_display_size(self):
+        """
+        Ширина и высота картинки - для атрибутов width/height у <img>,
+        чтобы верстка не прыгала при загрузке. Берутся из полей модели,
+        а у записей, до которых еще не дошел backfill_image_metadata, -
+        у самой крупной копии."""
+        if self.image_width and self.image_height:
+            return {'width': self.image_width, 'height': self.image_height}
+        variants = () if self.image_variants_stale else (
+            self.image_variants.get('variants', ()))
+        if not variants:
+            return None
+        largest = max(variants, key=lambda variant: variant['width'])
+        return {'width': largest['width'], 'height': largest['height']}
+
+    @property
+    def card_version(self) -> str:
+        """
+        Все, от чего зависит HTML карточки includes/post_card.html:
+        ключ ее фрагментного кеша. Правка самого поста меняет
+        updated_at, остальное - счетчик каментов и то, что
+        показывается из категории, локации и автора."""
+        location = self.location
+        return '|'.join(str(part) for part in (
+            self.updated_at.timestamp(),
+            self.comment_count,
+            self.is_published,
+            self.category.is_published,
+            self.category.slug,
+            self.category.title,
+            location and location.is_published,
+            location and location.name,
+            self.author.username,
+            self.image_variants.get('source'),
+        ))
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and self.pk is not None
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in POST_SERVICE_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -147,3 +363,111 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата и время публикации комментария'
     )
+
+    class Meta:
+        ordering = ('created_at', 'id')
+        indexes = (
+            models.Index(fields=('post', 'created_at'),
+                         name='comment_post_created_at_idx'),
+        )
+
+
+class TimelineQuerySet(models.QuerySet):
+    """Кверисет публичной ленты с операциями ее обслуживания.
+    """
+    def add_visible(self, posts, now=None) -> int:
+        """
+        Добавляет в ленту посты из posts, видимые всем на момент now
+        и еще не попавшие в ленту; возвращает число добавленных.
+        Читает пачками по id, а не одним курсором: SQLite не изолирует
+        открытый курсор от записи в ту же таблицу."""
+        now = now or timezone.now()
+        visible = posts.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=now,
+            timeline_entry__isnull=True,
+        ).order_by('id').values_list('id', 'category_id', 'pub_date')
+        added, last_id = 0, 0
+        while True:
+            rows = list(
+                visible.filter(id__gt=last_id)[:TIMELINE_BATCH_SIZE])
+            if not rows:
+                return added
+            self.bulk_create(
+                [self.model(post_id=post_id, category_id=category_id,
+                            pub_date=pub_date)
+                 for post_id, category_id, pub_date in rows],
+                ignore_conflicts=True)
+            added += len(rows)
+            last_id = rows[-1][0]
+
+    def sync(self, posts) -> None:
+        """
+        Приводит строки ленты для постов posts к их текущему состоянию:
+        видимые сейчас - в ленте, остальные - нет."""
+        with transaction.atomic():
+            self.filter(post__in=posts).delete()
+            self.add_visible(posts)
+
+    def rebuild(self) -> int:
+        """
+        Перестраивает ленту целиком одним INSERT ... SELECT, не гоняя
+        строки через Python; возвращает число строк в ленте."""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            return insert_visible_posts(Post, self.model, self.db)
+
+
+def insert_visible_posts(post_model, entry_model, using) -> int:
+    """
+    Вставляет в таблицу ленты entry_model все видимые сейчас посты
+    одним INSERT ... SELECT. Модели передаются параметрами, чтобы
+    то же самое могла сделать миграция со своими моделями."""
+    visible = post_model.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=timezone.now(),
+    ).values_list('id', 'category_id', 'pub_date')
+    sql, params = visible.query.get_compiler(using).as_sql()
+    connection = connections[using]
+    table = connection.ops.quote_name(entry_model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (post_id, category_id, pub_date) {sql}',
+            params)
+        return cursor.rowcount
+
+
+class TimelineEntry(models.Model):
+    """Класс модели материализованной публичной ленты:
+    по строке на каждый пост, который сейчас виден всем.
+    Правки постов и категорий обновляют ее сигналами сразу,
+    отложенные посты добавляет команда publish_scheduled_posts.
+    Главная и категории читают только эту узкую таблицу:
+    без JOIN-ов и без сравнения с текущим временем.
+    """
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='timeline_entry'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    objects = TimelineQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        indexes = (
+            models.Index(fields=('pub_date', 'post'),
+                         name='timeline_pub_date_idx'),
+            models.Index(fields=('category', 'pub_date', 'post'),
+                         name='timeline_category_pub_date_idx'),
+        )
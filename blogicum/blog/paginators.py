@@ -0,0 +1,225 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max, Q, QuerySet
+from django.utils.functional import cached_property
+
+from .cache import feed_generation
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MAX_PK = 2**63 - 1
+
+
+class InvalidCursor(Exception):
+    """Курсор из URL не удалось разобрать."""
+
+
+def encode_cursor(obj, fields) -> str:
+    """
+    Кодирует позицию объекта в ленте в строку для URL:
+    дата публикации в микросекундах от эпохи и id через точку."""
+    date_field, id_field = fields
+    delta = getattr(obj, date_field) - EPOCH
+    micro = (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+    return f'{micro}.{getattr(obj, id_field)}'
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Обратная операция к encode_cursor."""
+    try:
+        micro, pk = (int(part) for part in cursor.split('.'))
+        date = EPOCH + timedelta(microseconds=micro)
+    except (ValueError, AttributeError, OverflowError):
+        raise InvalidCursor(cursor)
+    # id больше, чем помещается в INTEGER SQLite, в базе не бывает.
+    if not 0 <= pk <= MAX_PK:
+        raise InvalidCursor(cursor)
+    return date, pk
+
+
+class CursorPage(Sequence):
+    """
+    Страница курсорной пагинации.
+    Интерфейс повторяет django.core.paginator.Page в той части,
+    которую использует шаблон includes/paginator.html."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # Курсоры считаются сразу: дальше object_list можно подменить
+        # (например, строки ленты - на сами посты).
+        self.next_cursor = has_next and encode_cursor(
+            object_list[-1], paginator.fields)
+        self.previous_cursor = has_previous and encode_cursor(
+            object_list[0], paginator.fields)
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинатор по паре (дата, id), по умолчанию
+    «от новых к старым». В отличие от Paginator не делает
+    ни OFFSET, ни COUNT(*): любая страница стоит как первая."""
+
+    def __init__(self, object_list: QuerySet, per_page: int,
+                 fields=('pub_date', 'id'), descending=True):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.fields = fields
+        self.descending = descending
+
+    def _beyond(self, date, pk, lookup) -> Q:
+        """
+        (дата, id) строго дальше (date, pk) в сторону lookup ('lt'/'gt').
+        Записано как «date <= x AND NOT (date = x AND id >= y)», а не
+        через OR: так SQLite берет по индексу диапазон дат, а не
+        проходит по всем записям новее курсора."""
+        date_field, id_field = self.fields
+        opposite = 'gte' if lookup == 'lt' else 'lte'
+        return (Q(**{f'{date_field}__{lookup[:2]}e': date})
+                & ~Q(**{date_field: date, f'{id_field}__{opposite}': pk}))
+
+    def _after(self, date, pk) -> Q:
+        return self._beyond(date, pk, 'lt' if self.descending else 'gt')
+
+    def _before(self, date, pk) -> Q:
+        return self._beyond(date, pk, 'gt' if self.descending else 'lt')
+
+    def page_queryset(self, after=None, before=None) -> QuerySet:
+        """
+        Запрос одной страницы: на одну запись больше размера страницы,
+        чтобы узнать, есть ли продолжение."""
+        forward = [f'-{field}' if self.descending else field
+                   for field in self.fields]
+        backward = [field.lstrip('-') if field.startswith('-')
+                    else f'-{field}' for field in forward]
+        if before is not None:
+            queryset = self.object_list.filter(
+                self._before(*decode_cursor(before))
+            ).order_by(*backward)
+        else:
+            queryset = self.object_list.order_by(*forward)
+            if after is not None:
+                queryset = queryset.filter(
+                    self._after(*decode_cursor(after)))
+        return queryset[:self.per_page + 1]
+
+    def page(self, after=None, before=None) -> CursorPage:
+        rows = list(self.page_queryset(after=after, before=before))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before is not None:
+            rows.reverse()
+            return CursorPage(rows, self, True, has_more)
+        return CursorPage(rows, self, has_more, after is not None)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, который берет общее число записей ленты из кеша.
+    count_key - имя ленты (главная, категория, автор); ключ кеша
+    включает поколение счетчиков, которое меняется при правке
+    постов и категорий и при наступлении времени отложенного поста.
+    FEED_COUNT_CACHE_TIMEOUT - страховка на случай, если что-то
+    поменяли в обход сигналов."""
+
+    def __init__(self, *args, count_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self) -> int:
+        if self.count_key is None:
+            return super().count
+        key = self.count_cache_key()
+        value = cache.get(key)
+        if value is None:
+            # Число уходит в кеш - считаем по основной базе, а не
+            # по реплике, которая может отставать.
+            value = self.object_list.using(DEFAULT_DB_ALIAS).count()
+            cache.set(key, value, settings.FEED_COUNT_CACHE_TIMEOUT)
+        return value
+
+    def count_cache_key(self) -> str:
+        return f'blog:count:{feed_generation()}:{self.count_key}'
+
+    def forget_count(self) -> None:
+        """
+        Сбрасывает закешированное число записей, если оно оказалось
+        устаревшим: следующий пагинатор этой ленты посчитает заново."""
+        if self.count_key is not None:
+            cache.delete(self.count_cache_key())
+        self.__dict__.pop('count', None)
+
+
+def estimate_row_count(queryset: QuerySet) -> int:
+    """
+    Примерное число строк таблицы модели без COUNT(*):
+    из статистики ANALYZE (sqlite_stat1), а если ее нет -
+    по наибольшему первичному ключу (один шаг по индексу)."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master"
+                " WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                # Первое число stat - строки в индексе; у частичного
+                # индекса (post_published_pub_date_idx) их меньше, чем
+                # в таблице, поэтому берется наибольшее.
+                cursor.execute(
+                    'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1'
+                    ' WHERE tbl = %s', [table])
+                rows, = cursor.fetchone()
+                if rows is not None:
+                    return rows
+    return queryset.model._default_manager.using(queryset.db).aggregate(
+        max_pk=Max('pk'))['max_pk'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для больших таблиц (админка): считает точно только
+    до count_limit записей, COUNT(*) по подзапросу с LIMIT.
+    Дальше для всей таблицы без фильтров берется оценка
+    estimate_row_count, а для отфильтрованной - сам предел:
+    номера страниц дальше него неточны, но открываются."""
+    count_limit = 10000
+
+    @cached_property
+    def count(self) -> int:
+        object_list = self.object_list
+        if not isinstance(object_list, QuerySet):
+            return super().count
+        limited = object_list.order_by()[:self.count_limit + 1].count()
+        if limited <= self.count_limit:
+            return limited
+        if not object_list.query.has_filters():
+            return max(limited, estimate_row_count(object_list))
+        return limited
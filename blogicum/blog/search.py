@@ -0,0 +1,92 @@
+import re
+
+from django.db.models import QuerySet
+
+SEARCH_TABLE = 'blog_post_fts'
+# Вес совпадения в заголовке и в тексте для bm25: заголовок важнее.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+# Внешнее содержимое (content=blog_post): индекс не хранит копию
+# текстов, а триггеры держат его в согласии с таблицей постов.
+SEARCH_INDEX_SQL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, text, content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai
+        AFTER INSERT ON blog_post BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, title, text)
+            VALUES (new.id, new.title, new.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad
+        AFTER DELETE ON blog_post BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au
+        AFTER UPDATE OF title, text ON blog_post BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+            INSERT INTO {SEARCH_TABLE}(rowid, title, text)
+            VALUES (new.id, new.title, new.text);
+        END""",
+)
+SEARCH_TRIGGERS = tuple(
+    f'{SEARCH_TABLE}_{suffix}' for suffix in ('ai', 'ad', 'au'))
+WORD = re.compile(r'\w+')
+
+
+def ensure_search_index(connection) -> None:
+    """
+    Создает полнотекстовый индекс постов и триггеры, если их нет,
+    и перестраивает индекс, если каких-то триггеров не хватало.
+    Вызывается из миграции и после каждого migrate: SQLite
+    пересоздает таблицу при изменении ее схемы, а триггеры
+    пропадают вместе со старой таблицей."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            " AND tbl_name = 'blog_post'")
+        existing = {row[0] for row in cursor.fetchall()}
+        for sql in SEARCH_INDEX_SQL:
+            cursor.execute(sql)
+        if not existing.issuperset(SEARCH_TRIGGERS):
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE})"
+                " VALUES ('rebuild')")
+
+
+def drop_search_index(connection) -> None:
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for trigger in SEARCH_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+def match_expression(query: str) -> str:
+    """
+    Запрос пользователя в выражение FTS5: каждое слово - префикс
+    в кавычках, так что операторы и спецсимволы FTS5 из строки
+    поиска не работают и не ломают запрос. Пустая строка - слов нет."""
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query))
+
+
+def search_posts(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Посты из queryset, в заголовке или тексте которых есть все слова
+    запроса, от самых подходящих (bm25) к менее подходящим.
+    Индекс присоединяется к постам по rowid = id одним JOIN-ом."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    return queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[f'{SEARCH_TABLE}.rowid = blog_post.id',
+               f'{SEARCH_TABLE} MATCH %s'],
+        params=[expression],
+        select={'search_rank': (
+            f'bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {TEXT_WEIGHT})')},
+    ).order_by('search_rank', '-pub_date', '-id')
@@ -0,0 +1,222 @@
+from collections import Counter
+from contextvars import ContextVar
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from core.jobs import enqueue
+
+from .cache import FEED, bump_generation, invalidate_pages
+from .lookups import categories, locations
+from .models import Category, Comment, Location, Post, TimelineEntry, User
+from .search import ensure_search_index
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """
+    Новый камент - плюс один к счетчику поста, атомарно, в самой БД."""
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1)
+
+
+class DeleteCascade:
+    """
+    Удаление постов или юзеров вместе с их каментами (и постами).
+    Django шлет post_delete на каждый камент, поэтому на время
+    каскада счетчики каментов копятся в decrements, а сброс кешей -
+    в флагах, и все это применяется один раз в конце (см. finish).
+    deleting - еще не удаленные (model, pk) из тех, с кого начался
+    каскад: их pre_delete приходит до удаления каментов, а
+    post_delete - после."""
+
+    def __init__(self):
+        self.deleting = set()
+        self.posts = set()
+        self.decrements = Counter()
+        self.feed_changed = False
+        self.pages_changed = False
+
+    def finish(self) -> None:
+        by_amount = {}
+        for post_id, amount in self.decrements.items():
+            if post_id not in self.posts:
+                by_amount.setdefault(amount, []).append(post_id)
+        for amount, post_ids in by_amount.items():
+            Post.objects.filter(pk__in=post_ids).update(
+                comment_count=Greatest(F('comment_count') - amount, Value(0)))
+        if self.feed_changed:
+            bump_generation(FEED)
+        if self.pages_changed:
+            invalidate_pages()
+
+
+delete_cascade = ContextVar('delete_cascade', default=None)
+
+
+@receiver(request_started)
+def forget_delete_cascade(sender, **kwargs):
+    """
+    Если удаление упало посреди каскада, его post_delete так и не
+    пришел - следующий запрос не должен копить изменения в нем."""
+    delete_cascade.set(None)
+
+
+@receiver(pre_delete, sender=Post)
+@receiver(pre_delete, sender=User)
+def start_delete_cascade(sender, instance, **kwargs):
+    cascade = delete_cascade.get()
+    if cascade is None:
+        cascade = DeleteCascade()
+        delete_cascade.set(cascade)
+    cascade.deleting.add((sender, instance.pk))
+    if sender is Post:
+        cascade.posts.add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=User)
+def finish_delete_cascade(sender, instance, **kwargs):
+    cascade = delete_cascade.get()
+    if cascade is None:
+        return
+    cascade.deleting.discard((sender, instance.pk))
+    if not cascade.deleting:
+        delete_cascade.set(None)
+        cascade.finish()
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """
+    Удаление камента (из вьюхи, из админки или каскадом) -
+    минус один к счетчику поста. В каскаде счетчики удаляемых
+    постов не трогаются, а остальные правятся в конце, по разу
+    на пост."""
+    cascade = delete_cascade.get()
+    if cascade is not None:
+        cascade.decrements[instance.post_id] += 1
+        return
+    Post.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_feed_counts(sender, **kwargs):
+    """
+    Правка поста или категории может изменить состав лент,
+    поэтому закешированные счетчики лент уходят в прошлое поколение."""
+    cascade = delete_cascade.get()
+    if cascade is not None:
+        cascade.feed_changed = True
+        return
+    bump_generation(FEED)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_page_cache(sender, **kwargs):
+    """
+    Любая правка того, что видно в лентах, - новое поколение
+    кеша страниц для анонимов."""
+    cascade = delete_cascade.get()
+    if cascade is not None:
+        cascade.pages_changed = True
+        return
+    invalidate_pages()
+
+
+@receiver(post_save, sender=User)
+def invalidate_page_cache_on_profile_change(sender, update_fields, **kwargs):
+    """
+    Имя автора видно в карточках и на странице профиля.
+    Вход на сайт тоже сохраняет юзера (last_login) - это не повод."""
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        invalidate_pages()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_lookup(sender, **kwargs):
+    categories.invalidate()
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_lookup(sender, **kwargs):
+    locations.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def sync_post_timeline(sender, instance, **kwargs):
+    """
+    Пост снят, возвращен, перенесен в будущее или в другую
+    категорию - публичная лента узнает об этом сразу."""
+    TimelineEntry.objects.sync(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def sync_category_timeline(sender, instance, **kwargs):
+    TimelineEntry.objects.sync(Post.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Post)
+def refresh_post_image_variants(sender, instance, **kwargs):
+    """
+    Новая или замененная картинка - новые уменьшенные копии.
+    Их делает фоновая задача: запрос не ждет Pillow."""
+    if instance.image_variants_stale:
+        enqueue('blog.refresh_image_variants', post_id=instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_replaced_image(sender, instance, **kwargs):
+    """
+    Запоминает прежнюю картинку поста, если ее заменили или убрали:
+    после сохранения ее файл, возможно, пора удалить."""
+    instance._replaced_image = None
+    if instance.pk is None:
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'image', flat=True).first()
+    if previous and previous != instance.image.name:
+        instance._replaced_image = previous
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    if getattr(instance, '_replaced_image', None):
+        enqueue('blog.release_image', name=instance._replaced_image)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_post_image(sender, instance, **kwargs):
+    if instance.image:
+        enqueue('blog.release_image', name=instance.image.name)
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    """
+    После migrate возвращает триггеры полнотекстового индекса,
+    если миграция пересоздала таблицу постов (см. blog.search)."""
+    connection = connections[using]
+    if (sender.label == 'blog'
+            and Post._meta.db_table in connection.introspection.table_names()):
+        ensure_search_index(connection)
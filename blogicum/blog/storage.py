@@ -0,0 +1,66 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from .images import variant_source
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """
+    Хранилище картинок постов с адресацией по содержимому:
+    файл ложится в <каталог>/ab/cd/<sha256><расширение>, где
+    хеш считается на лету, пока загрузка пишется во временный файл.
+    Одинаковые картинки хранятся один раз, а URL файла никогда
+    не меняет содержимого - его можно кешировать навсегда.
+    Файл общий для всех постов с такой картинкой, поэтому удаляет
+    его не хранилище, а задача blog.release_image - когда на него
+    не осталось ссылок.
+    Уменьшенные копии (blog.images) уже названы по оригиналу
+    и сохраняются под своим именем, как в FileSystemStorage."""
+
+    def get_available_name(self, name, max_length=None):
+        if variant_source(name) is not None:
+            return super().get_available_name(name, max_length)
+        # Имя все равно заменит хеш содержимого.
+        return name
+
+    def hashed_name(self, name: str, digest: str) -> str:
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(
+            directory, digest[:2], digest[2:4], f'{digest}{extension}')
+
+    def _save(self, name, content):
+        if variant_source(name) is not None:
+            return super()._save(name, content)
+        os.makedirs(self.location, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.location, prefix='.upload-')
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = self.hashed_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                # Файл уже есть - «освежаем» его: collect_orphan_media
+                # не трогает свежие файлы, а ссылка из БД на него
+                # появится, только когда закончится транзакция.
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                # Переименование атомарно: параллельная загрузка того же
+                # файла просто заменит его таким же.
+                os.replace(temp_path, full_path)
+                temp_path = None
+        finally:
+            if temp_path is not None:
+                os.remove(temp_path)
+        return name
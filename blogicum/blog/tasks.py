@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.jobs import task
+
+from .cache import invalidate_pages
+from .images import delete_with_variants
+from .models import Post
+
+
+@task('blog.refresh_image_variants')
+def refresh_image_variants(post_id: int) -> None:
+    """
+    Уменьшенные копии картинки поста. Пока их нет, шаблоны
+    показывают оригинал; когда появились - сбрасываем кеш
+    страниц, чтобы анонимы тоже получили srcset."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image_variants_stale:
+        return
+    post.refresh_image_variants()
+    invalidate_pages()
+
+
+@task('blog.release_image')
+def release_image(name: str) -> None:
+    """
+    Картинку убрали из поста или удалили сам пост. Файл общий
+    для всех постов с такой же картинкой (ContentHashStorage),
+    поэтому удаляется, только если ссылок на него больше нет.
+    Свежий файл не трогаем: загрузка тех же байтов только обновила
+    ему mtime (ContentHashStorage), а пост с ней еще не сохранен.
+    Такой файл, если он так и останется ничьим, уберет
+    collect_orphan_media."""
+    if Post.objects.filter(image=name).exists():
+        return
+    storage = Post._meta.get_field('image').storage
+    try:
+        modified = storage.get_modified_time(name)
+    except OSError:
+        modified = None
+    if modified is not None and modified > timezone.now() - timedelta(
+            seconds=settings.ORPHAN_MEDIA_MIN_AGE):
+        return
+    delete_with_variants(storage, name)
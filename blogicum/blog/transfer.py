@@ -0,0 +1,128 @@
+import datetime
+import json
+from itertools import islice
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+
+from .cache import FEED, bump_generation, invalidate_pages
+from .lookups import categories, locations
+
+# Что переносят blog_export/blog_import, в порядке зависимостей:
+# каждая модель ссылается только на модели выше нее.
+# Лента и счетчики каментов не переносятся, а пересчитываются.
+TRANSFER_MODELS = (
+    'auth.User', 'blog.Category', 'blog.Location', 'blog.Post',
+    'blog.Comment',
+)
+
+
+class TransferJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder обрезает время до миллисекунд; выгрузке нужны
+    микросекунды, иначе поменяется порядок каментов (created_at, id)."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def transfer_models() -> list:
+    return [apps.get_model(label) for label in TRANSFER_MODELS]
+
+
+def chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def export_lines(chunk_size: int, using: str = 'default'):
+    """
+    Строки JSON Lines со всеми объектами TRANSFER_MODELS: запись на
+    строку в формате сериализаторов Django ({model, pk, fields}).
+    Объекты читаются iterator(chunk_size=...), так что в памяти
+    не больше одной пачки. Связи многие-ко-многим (группы и права
+    пользователей) не переносятся: пакетная вставка их не сохраняет."""
+    for model in transfer_models():
+        fields = [field.name for field in model._meta.concrete_fields]
+        objects = model._default_manager.using(using).order_by('pk')
+        for chunk in chunks(objects.iterator(chunk_size=chunk_size),
+                            chunk_size):
+            for record in serializers.serialize(
+                    'python', chunk, fields=fields):
+                yield json.dumps(
+                    record, cls=TransferJSONEncoder, ensure_ascii=False)
+
+
+def import_lines(lines, chunk_size: int, using: str = 'default') -> dict:
+    """
+    Загружает строки из export_lines пачками INSERT в одной
+    транзакции и возвращает {метка модели: число объектов}.
+    Как и loaddata, проверяет внешние ключи один раз в конце,
+    а не на каждую строку. Сигналы post_save при этом не
+    срабатывают: производные данные пересчитывает rebuild_derived."""
+    connection = connections[using]
+    counts = {}
+    records = (json.loads(line) for line in lines if line.strip())
+    with transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            for chunk in chunks(records, chunk_size):
+                _save_chunk(chunk, using, counts)
+        models = [apps.get_model(label) for label in counts]
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in models])
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), models):
+                cursor.execute(sql)
+    return counts
+
+
+def _save_chunk(records, using: str, counts: dict) -> None:
+    batch, batch_model = [], None
+    for deserialized in serializers.deserialize(
+            'python', records, using=using):
+        obj = deserialized.object
+        if batch and type(obj) is not batch_model:
+            _insert_raw(batch, using, counts)
+            batch = []
+        batch_model = type(obj)
+        batch.append(obj)
+    if batch:
+        _insert_raw(batch, using, counts)
+
+
+def _insert_raw(objects: list, using: str, counts: dict) -> None:
+    """
+    Вставляет объекты в «сыром» режиме, как loaddata: без pre_save,
+    так что auto_now_add/auto_now поля сохраняют значения из выгрузки,
+    а не получают время загрузки."""
+    model = type(objects[0])
+    fields = model._meta.concrete_fields
+    batch_size = max(1, connections[using].ops.bulk_batch_size(
+        fields, objects))
+    for batch in chunks(objects, batch_size):
+        model._base_manager._insert(
+            batch, fields=fields, using=using, raw=True)
+    label = model._meta.label
+    counts[label] = counts.get(label, 0) + len(objects)
+
+
+def rebuild_derived() -> None:
+    """
+    Пересчитывает то, что обычно ведут сигналы, после массовой
+    загрузки в обход них: счетчики каментов, ленту, копии
+    категорий и локаций в памяти и кеши страниц."""
+    Post = apps.get_model('blog.Post')
+    TimelineEntry = apps.get_model('blog.TimelineEntry')
+    Post.objects.rebuild_comment_counts()
+    TimelineEntry.objects.rebuild()
+    categories.invalidate()
+    locations.invalidate()
+    bump_generation(FEED)
+    invalidate_pages()
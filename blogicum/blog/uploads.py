@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.template.defaultfilters import filesizeformat
+
+# Первые байты файлов тех форматов, которые принимаем как картинки.
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',  # JPEG
+    b'\x89PNG\r\n\x1a\n',
+    b'GIF87a',
+    b'GIF89a',
+)
+NOT_AN_IMAGE = 'Загрузите картинку в формате JPEG, PNG, GIF или WebP.'
+
+
+def looks_like_image(header: bytes) -> bool:
+    """
+    По первым байтам файла: похоже ли это на картинку.
+    Саму картинку потом все равно проверит ImageField."""
+    if header.startswith(b'RIFF') and header[8:12] == b'WEBP':
+        return True
+    return header.startswith(IMAGE_SIGNATURES)
+
+
+class BoundedImageUploadHandler(FileUploadHandler):
+    """
+    Первый в цепочке обработчиков загрузки: пропускает данные
+    дальше (в память или во временный файл), но бросает файл,
+    как только по первому куску видно, что это не картинка,
+    или как только он перерос max_size байт. Остаток такого файла
+    Django дочитывает из запроса вхолостую, никуда не складывая.
+    Причины отказа копятся в errors по именам полей -
+    их показывает форма."""
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size or settings.POST_IMAGE_MAX_UPLOAD_SIZE
+        self.errors = {}
+
+    def reject(self, message: str):
+        self.errors[self.field_name] = message
+        raise SkipFile(message)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not looks_like_image(raw_data[:12]):
+            self.reject(NOT_AN_IMAGE)
+        if start + len(raw_data) > self.max_size:
+            self.reject(
+                f'Картинка должна быть не больше '
+                f'{filesizeformat(self.max_size)}.')
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Файл собирают следующие обработчики цепочки.
+        return None
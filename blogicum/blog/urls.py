@@ -10,10 +10,13 @@ urlpatterns = [
          views.CategoryView.as_view(), name='category_posts'),
     path('profile/<slug:username>/',
          views.UserDetailView.as_view(), name='profile'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('edit_profile/', views.UserUpdateView.as_view(), name='edit_profile'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path('posts/<int:pk>/',
          views.PostDetailView.as_view(), name='post_detail'),
+    path('posts/<int:pk>/comments/',
+         views.CommentListView.as_view(), name='comments'),
     path('posts/<int:pk>/edit/',
          views.PostUpdateView.as_view(), name='edit_post'),
     path('posts/<int:pk>/delete/',
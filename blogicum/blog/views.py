@@ -1,18 +1,30 @@
-from typing import Any
+from typing import Any, Optional
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, QuerySet
+from django.core.cache import cache
+from django.db.models import QuerySet
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
-                                  UpdateView)
+                                  TemplateView, UpdateView)
 
+from core.routers import use_primary
+
+from .cache import page_cache_key
 from .forms import CommentForm, PostForm, UserUpdateForm
-from .models import Category, Comment, Post, User
+from .models import Category, Comment, Post, TimelineEntry, User
+from .paginators import (CachedCountPaginator, CursorPage, CursorPaginator,
+                         InvalidCursor, encode_cursor)
+from .search import search_posts
+from .uploads import BoundedImageUploadHandler
 
 PAGINATE_BY_THIS = 10
+COMMENTS_PER_PAGE = 20
 
 
 def author_selected(username_required) -> User:
@@ -24,44 +36,170 @@ def author_selected(username_required) -> User:
 
 def posts_just_selected() -> QuerySet:
     """
-    Возвращает queryset модели Post с заджойненными к ней моделями
-    Category, Location, User, без фильтрации,
-    только сортировка по дате публикации."""
+    Возвращает queryset модели Post с заджойненной к ней моделью User
+    и подставленными из памяти процесса Category и Location
+    (см. blog.lookups), без фильтрации,
+    только сортировка по дате публикации
+    (id - для однозначного порядка при курсорной пагинации)."""
     return Post.objects.select_related(
-        'category',
-        'location',
         'author'
-    ).order_by('-pub_date')
+    ).with_cached_relations().order_by('-pub_date', '-id')
 
 
 def posts_selected() -> QuerySet:
     """
-    Возвращает queryset модели Post с заджойненными к ней моделями
-    Category, Location, User, с фильтрацией,
-    сортировка по дате публикации,
-    с присоединенным полем счетчика каментов."""
+    Возвращает queryset модели Post из posts_just_selected(),
+    с фильтрацией,
+    сортировка по дате публикации.
+    Счетчик каментов хранится в самом посте (Post.comment_count)."""
     return posts_just_selected().filter(
         is_published=True,
         category__is_published=True,
         pub_date__lte=timezone.now()
-    ).annotate(comment_count=Count('comments'))
+    )
 
 
 def posts_selected_with_unpublished_and_future() -> QuerySet:
     """
-    Возвращает queryset модели Post с заджойненными к ней моделями
-    Category, Location, User, без фильтрации,
-    сортировка по дате публикации,
-    с присоединенным полем счетчика каментов."""
-    return posts_just_selected().annotate(
-        comment_count=Count('comments'))
+    Возвращает queryset модели Post из posts_just_selected(),
+    без фильтрации,
+    сортировка по дате публикации.
+    Счетчик каментов хранится в самом посте (Post.comment_count)."""
+    return posts_just_selected()
+
+
+def timeline_selected() -> QuerySet:
+    """
+    Возвращает queryset материализованной публичной ленты:
+    только видимые всем посты, сортировка по дате публикации.
+    Сами посты подставляет TimelineMixin после пагинации.
+    Отложенных постов в ленте нет, поэтому и сравнения с текущим
+    временем нет: первая страница - проход по индексу с начала
+    с LIMIT."""
+    return TimelineEntry.objects.order_by('-pub_date', '-post_id')
 
 
 class PaginateMixin:
     """
     Миксин пагинирования - в трех местах потом.
+    Кроме обычного ?page=N понимает ?after=<курсор> и ?before=<курсор>:
+    в этом режиме страница выбирается по ключу (pub_date, id)
+    без OFFSET и COUNT(*).
+    В режиме ?page=N общее число записей берется из кеша
+    по ключу ленты из get_count_key(), а в контекст кладется
+    свернутый список номеров страниц page_range: первые, последние
+    и соседние с текущей, остальное - многоточием.
     """
     paginate_by = PAGINATE_BY_THIS
+    paginator_class = CachedCountPaginator
+    cursor_fields = ('pub_date', 'id')
+    page_range_on_each_side = 2
+    page_range_on_ends = 1
+
+    def get_count_key(self) -> Optional[str]:
+        """
+        Ключ ленты для кеша числа записей. None - считать
+        COUNT(*) на каждый запрос, без кеша."""
+        return None
+
+    def get_paginator(self, *args, **kwargs):
+        return super().get_paginator(  # type: ignore
+            *args, count_key=self.get_count_key(), **kwargs)
+
+    def get_page_objects(self, rows) -> list:
+        """
+        Превращает строки страницы в то, что увидит шаблон.
+        По умолчанию это те же строки."""
+        return list(rows)
+
+    def paginate_queryset(self, queryset, page_size):
+        after = self.request.GET.get('after')  # type: ignore
+        before = self.request.GET.get('before')  # type: ignore
+        if after is None and before is None:
+            paginator, page, object_list, is_paginated = (
+                super().paginate_queryset(  # type: ignore
+                    queryset, page_size))
+            rows = list(page.object_list)
+            if not rows and paginator.count:
+                # Число записей из кеша больше настоящего (устарело
+                # или кеш у процесса свой): считаем заново, а страница
+                # за пределами ленты станет 404.
+                paginator.forget_count()
+                paginator, page, object_list, is_paginated = (
+                    super().paginate_queryset(  # type: ignore
+                        queryset, page_size))
+                rows = list(page.object_list)
+            page.next_cursor = rows and page.has_next() and encode_cursor(
+                rows[-1], self.cursor_fields)
+            page.previous_cursor = (
+                rows and page.has_previous()
+                and encode_cursor(rows[0], self.cursor_fields))
+            page.object_list = self.get_page_objects(rows)
+            return paginator, page, page.object_list, is_paginated
+        paginator = CursorPaginator(queryset, page_size, self.cursor_fields)
+        try:
+            page = paginator.page(after=after, before=before)
+        except InvalidCursor:
+            raise Http404
+        page.object_list = self.get_page_objects(page.object_list)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)  # type: ignore
+        page = context['page_obj']
+        if page is not None and not getattr(page, 'is_cursor', False):
+            context['page_range'] = page.paginator.get_elided_page_range(
+                page.number,
+                on_each_side=self.page_range_on_each_side,
+                on_ends=self.page_range_on_ends)
+        return context
+
+
+class TimelineMixin:
+    """
+    Миксин лент, которые пагинируются по таблице TimelineEntry:
+    строки текущей страницы заменяются постами одним запросом.
+    """
+    cursor_fields = ('pub_date', 'post_id')
+
+    def get_page_objects(self, rows) -> list:
+        posts = posts_just_selected().in_bulk(
+            [row.post_id for row in rows])
+        return [posts[row.post_id] for row in rows if row.post_id in posts]
+
+
+class AnonymousPageCacheMixin:
+    """
+    Миксин кеширования страницы целиком для незалогиненных:
+    у них HTML ленты одинаковый. Ключ - имя вьюхи, ее kwargs
+    и строка запроса (номер страницы или курсор) плюс поколение
+    кеша страниц, которое меняют сигналы из blog.signals.
+    Залогиненные всегда идут мимо кеша.
+    """
+    page_cache_timeout = settings.PAGE_CACHE_TIMEOUT
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)  # type: ignore
+        key = page_cache_key(request.resolver_match.view_name, kwargs,
+                             request.META.get('QUERY_STRING', ''))
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        # Страница уйдет в кеш, поэтому читается с основной базы
+        # и рендерится тут же, пока действует use_primary.
+        with use_primary():
+            response = super().dispatch(  # type: ignore
+                request, *args, **kwargs)
+            if response.status_code == 200:
+                response.add_post_render_callback(
+                    lambda rendered: cache.set(
+                        key, (rendered.content, rendered['Content-Type']),
+                        self.page_cache_timeout))
+            if hasattr(response, 'render'):
+                response.render()
+        return response
 
 
 class DispatchPostMixin:
@@ -78,33 +216,36 @@ class DispatchPostMixin:
         return super().dispatch(request, *args, **kwargs)  # type: ignore
 
 
-class IndexView(PaginateMixin, ListView):
+class IndexView(AnonymousPageCacheMixin, TimelineMixin, PaginateMixin,
+                ListView):
     """Класс для CBV, которая
     отображает главную страницу."""
     # model = Post # если задан get_qweryset, то эта команда лишняя уже
     # Пагинирование задано подмешиванием миксина пагинирования.
     template_name = 'blog/index.html'
 
+    def get_count_key(self) -> str:
+        return 'index'
+
     def get_queryset(self) -> QuerySet:
-        return posts_selected()
+        return timeline_selected()
 
 
-class CategoryView(PaginateMixin, ListView):
+class CategoryView(AnonymousPageCacheMixin, TimelineMixin, PaginateMixin,
+                   ListView):
     """Класс для CBV, которая
     отображает все (почти) посты заданной категории."""
     template_name = 'blog/category.html'
 
+    def get_count_key(self) -> str:
+        return f'category:{self.kwargs["category_slug"]}'
+
     def get_queryset(self) -> QuerySet:
         category = get_object_or_404(
             Category, slug=self.kwargs['category_slug'])
         if not category.is_published:
             raise Http404
-        return posts_just_selected().filter(
-            category=category,
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()).annotate(
-                comment_count=Count('comments'))
+        return timeline_selected().filter(category=category)
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
@@ -113,7 +254,7 @@ class CategoryView(PaginateMixin, ListView):
         return context
 
 
-class UserDetailView(PaginateMixin, ListView):
+class UserDetailView(AnonymousPageCacheMixin, PaginateMixin, ListView):
     """Класс для CBV, которая
     отображает детализированную информацию
     об одном конкретном пользователе."""
@@ -123,6 +264,9 @@ class UserDetailView(PaginateMixin, ListView):
     slug_field = 'username'
     context_object_name = 'profile'
 
+    def get_count_key(self) -> str:
+        return f'author:{self.kwargs["username"]}'
+
     def get_queryset(self) -> QuerySet:
         return posts_selected_with_unpublished_and_future().filter(
             author=author_selected(self.kwargs['username'])
@@ -134,6 +278,22 @@ class UserDetailView(PaginateMixin, ListView):
         return context
 
 
+class SearchView(ListView):
+    """Класс для CBV, которая
+    ищет по заголовкам и текстам видимых всем постов
+    (полнотекстовый индекс, см. blog.search)."""
+    template_name = 'blog/search.html'
+    paginate_by = PAGINATE_BY_THIS
+
+    def get_queryset(self) -> QuerySet:
+        return search_posts(posts_selected(), self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
 class UserUpdateView(LoginRequiredMixin, UpdateView):
     """Класс для CBV, которая
     апдейтит профиль залогиненного юзера."""
@@ -145,7 +305,29 @@ class UserUpdateView(LoginRequiredMixin, UpdateView):
         return self.request.user
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostImageUploadMixin:
+    """
+    Ставит BoundedImageUploadHandler первым обработчиком загрузки.
+    Обработчики можно менять только до чтения request.POST,
+    а CsrfViewMiddleware читает его раньше вьюхи, - поэтому
+    CSRF здесь проверяется не в middleware, а уже после замены."""
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        self.upload_handler = BoundedImageUploadHandler(request)
+        request.upload_handlers.insert(0, self.upload_handler)
+        return self.dispatch_csrf_protected(request, *args, **kwargs)
+
+    @method_decorator(csrf_protect)
+    def dispatch_csrf_protected(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)  # type: ignore
+
+    def get_form_kwargs(self) -> dict[str, Any]:
+        kwargs = super().get_form_kwargs()  # type: ignore
+        kwargs['upload_errors'] = self.upload_handler.errors
+        return kwargs
+
+
+class PostCreateView(PostImageUploadMixin, LoginRequiredMixin, CreateView):
     """Класс для CBV, которая
     создает новый пост залогиненного юзера."""
     model = Post
@@ -164,32 +346,71 @@ class PostCreateView(LoginRequiredMixin, CreateView):
             kwargs={'username': self.request.user.username})  # type: ignore
 
 
-class PostDetailView(DetailView):
+class PostVisibilityMixin:
+    """
+    Миксин выборки поста, который можно показывать текущему юзеру:
+    опубликованный, в опубликованной категории и не из будущего,
+    либо свой собственный.
+    """
+    def get_post(self, pk) -> Post:
+        post = get_object_or_404(Post.objects.select_related(
+            'category', 'author', 'location'), id=pk)
+        if (self.request.user == post.author  # type: ignore
+           or post.pub_date <= timezone.now()
+           and post.is_published
+           and post.category.is_published):
+            return post
+        raise Http404
+
+
+def comments_page(post: Post, after=None) -> CursorPage:
+    """
+    Возвращает очередную порцию каментов к посту «от старых к новым»
+    вместе с их авторами (одним JOIN-ом, а не запросом на камент)."""
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),  # type: ignore
+        COMMENTS_PER_PAGE, fields=('created_at', 'id'), descending=False)
+    try:
+        return paginator.page(after=after)
+    except InvalidCursor:
+        raise Http404
+
+
+class PostDetailView(PostVisibilityMixin, DetailView):
     """Класс для CBV, которая
     отображает все данные
     по одному конкретному посту,
-    включая каменты к нему."""
+    включая первую порцию каментов к нему."""
 
     template_name = 'blog/detail.html'
 
     def get_object(self, queryset=None) -> Post:
-        object = get_object_or_404(Post.objects.select_related(
-            'category', 'author', 'location'), id=self.kwargs['pk'])
-        if (self.request.user == object.author
-           or object.pub_date <= timezone.now()
-           and object.is_published
-           and object.category.is_published):
-            return object
-        raise Http404
+        return self.get_post(self.kwargs['pk'])
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.all()  # type: ignore
+        context['comments'] = comments_page(self.object)  # type: ignore
+        return context
+
+
+class CommentListView(PostVisibilityMixin, TemplateView):
+    """Класс для CBV, которая
+    отдает HTML-фрагмент со следующей порцией каментов к посту,
+    начиная после курсора ?after=."""
+
+    template_name = 'includes/comment_list.html'
+
+    def get_context_data(self, **kwargs) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context['post'] = self.get_post(self.kwargs['pk'])
+        context['comments'] = comments_page(
+            context['post'], after=self.request.GET.get('after'))
         return context
 
 
-class PostUpdateView(DispatchPostMixin, LoginRequiredMixin, UpdateView):
+class PostUpdateView(PostImageUploadMixin, DispatchPostMixin,
+                     LoginRequiredMixin, UpdateView):
     """Класс для CBV, которая
     редактирует пост, если залогинен его автор."""
 
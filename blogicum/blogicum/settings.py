@@ -5,6 +5,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 TEMPLATES_DIR = BASE_DIR / 'templates'
 STATICFILES_DIRS = [BASE_DIR / 'static_dev', ]
 MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
 
 SECRET_KEY = 'django-insecure-yiz^q++4ct#5e4s$kv7&9-(_&6zux*@!q%&p%234rtf%os6!4d'
 
@@ -19,6 +20,7 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'django_bootstrap5',
+    'core.apps.CoreConfig',
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
     'django.contrib.admin',
@@ -35,6 +37,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -59,13 +62,103 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+# core.backends.sqlite3 проверяет живость соединения перед повторным
+# использованием; CONN_MAX_AGE - сколько секунд поток держит соединение
+# открытым между запросами (под ASGI вместо этого пул, см. asgi.py).
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+    },
+    # Локальная реплика - копия db.sqlite3, которую обновляет команда
+    # refresh_replica. Только для чтения: PRAGMAS заменяют для нее
+    # SQLITE_PRAGMAS (см. core.db).
+    'replica': {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'PRAGMAS': {
+            'query_only': 1,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+# Пул соединений на файл базы под ASGI: сколько соединений можно
+# выдать одновременно и сколько секунд ждать свободного.
+DATABASE_POOL = {'SIZE': 8, 'TIMEOUT': 10}
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# С каких баз читать в запросах (core.routers); пусто - только с default.
+# Локально: ['replica'] и запущенная refresh_replica --loop.
+DATABASE_REPLICAS = []
+# Сколько секунд после записи сессия читает только с основной базы.
+REPLICA_STICKY_SECONDS = 30
+
+# Журнал WAL (читатели не ждут писателя). Режим журнала хранится
+# в самом файле базы, поэтому его включает команда sqlite_journal_mode
+# при развертывании, а не каждое соединение: иначе любая команда
+# manage.py переписывала бы db.sqlite3 и оставляла рядом -wal и -shm.
+SQLITE_JOURNAL_MODE = 'WAL'
+# PRAGMA, которые core.db выставляет каждому соединению с SQLite:
+# fsync только на контрольных точках (при WAL), mmap на 256 МБ, кеш
+# страниц на 64 МБ (отрицательное значение - в КиБ), временные таблицы
+# в памяти и ожидание блокировки до 5 секунд.
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# Поколения кеша страниц и счетчиков лент хранятся в самом кеше
+# (blog.cache), поэтому LocMemCache годится только для одного процесса.
+# При нескольких воркерах нужен общий кеш, иначе правка в одном воркере
+# не сбросит страницы других до PAGE_CACHE_TIMEOUT (см. check --deploy).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Сколько секунд живет закешированное число постов в ленте;
+# правки постов и категорий сбрасывают его раньше, через сигналы.
+FEED_COUNT_CACHE_TIMEOUT = 60
+
+# Сколько секунд живет закешированная для анонимов страница ленты;
+# правки контента сбрасывают кеш раньше, через сигналы.
+PAGE_CACHE_TIMEOUT = 300
+# Не дольше скольких секунд живет копия категорий и локаций в памяти
+# процесса (blog.lookups), если правку сделал другой процесс.
+LOOKUP_MAX_AGE = 60
+
+# Фоновые задачи core.jobs: сколько потоков их выполняет внутри
+# процесса сайта (0 - только командой run_jobs) и сколько раз
+# повторять упавшую задачу.
+JOBS_WORKERS = 2
+JOBS_MAX_ATTEMPTS = 3
+
+# Предельный размер картинки поста, байт: больший файл бросается
+# еще при загрузке, не дочитанным (blog.uploads).
+POST_IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+# Файлы картинок моложе стольких секунд не удаляются как ненужные:
+# пост, который на них сошлется, может быть еще не сохранен
+# (blog.tasks.release_image, collect_orphan_media).
+ORPHAN_MEDIA_MIN_AGE = 3600
+
+# Отдача медиафайлов вьюхой core.views.serve_media.
+# Сколько секунд браузер и CDN могут не перепроверять файл, названный
+# не по хешу содержимого (названные по хешу кешируются на год).
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
+# None - байты отдает сам Django; 'x-sendfile' (Apache, lighttpd) или
+# 'x-accel-redirect' (nginx) - отдает прокси, а для nginx внутренний
+# location с alias на MEDIA_ROOT задается MEDIA_ACCEL_REDIRECT_PREFIX.
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -92,6 +185,14 @@ USE_L10N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'static'
+# В бою collectstatic пишет файлы с хешем в имени, манифест и сжатые
+# копии, а отдает их из памяти core.staticfiles.StaticFilesMiddleware
+# (см. wsgi.py). Файлам без хеша в имени - такой срок кеша, секунд.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage')
+STATIC_CACHE_MAX_AGE = 60 * 60
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
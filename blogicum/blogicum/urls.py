@@ -1,14 +1,16 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path, reverse_lazy
 from django.views.generic import CreateView
 
+from core.views import db_connections, serve_media
+
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_failure'
 
 urlpatterns = [
+    path('admin/db-connections/', db_connections, name='db_connections'),
     path('admin/', admin.site.urls),
     path(
         'auth/registration/',
@@ -21,5 +23,7 @@ urlpatterns = [
     ),
     path('auth/', include('django.contrib.auth.urls')),
     path('pages/', include('pages.urls')),
+    path(f'{settings.MEDIA_URL.lstrip("/")}<path:path>', serve_media,
+         name='media'),
     path('', include('blog.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
@@ -2,6 +2,8 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from core.staticfiles import StaticFilesMiddleware
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
-application = get_wsgi_application()
+application = StaticFilesMiddleware(get_wsgi_application())
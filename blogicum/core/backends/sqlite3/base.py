@@ -0,0 +1,138 @@
+import os
+import threading
+
+from django.db.backends.sqlite3.base import (
+    Database, DatabaseWrapper as SQLiteDatabaseWrapper,
+)
+
+# Пулы соединений процесса по имени файла базы.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул соединений с одним файлом SQLite.
+    Одновременно выдано не больше size соединений; кто не дождался
+    свободного за timeout секунд, получает OperationalError.
+    Вернувшиеся соединения не закрываются, а ждут следующего
+    (последнее вернувшееся выдается первым: его страницы еще в кеше)."""
+
+    def __init__(self, size: int, timeout: float):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Занимает место в пуле."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise Database.OperationalError('Все соединения пула заняты.')
+
+    def take(self):
+        """
+        Свободное соединение (вместе с file_identity его файла)
+        или None, если соединение нужно открыть."""
+        with self._lock:
+            return self._idle.pop() if self._idle else None
+
+    def release(self, entry=None) -> None:
+        """
+        Освобождает место в пуле; entry - соединение, которое
+        можно выдать снова, в том же виде, в каком его вернул take."""
+        if entry is not None:
+            with self._lock:
+                self._idle.append(entry)
+        self._slots.release()
+
+
+def get_pool(name: str, options: dict) -> ConnectionPool:
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ConnectionPool(
+                options.get('SIZE', 8), options.get('TIMEOUT', 10))
+        return _pools[name]
+
+
+def file_identity(name):
+    try:
+        stat = os.stat(name)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class DatabaseWrapper(SQLiteDatabaseWrapper):
+    """
+    SQLite с проверкой живости соединения и пулом.
+    Соединение считается живым, пока отвечает на SELECT 1 и пока
+    файл базы не подменили (refresh_replica кладет реплику новым
+    файлом, и старое соединение читало бы прежнюю копию).
+    Если в настройках базы есть POOL ({'SIZE': ..., 'TIMEOUT': ...}),
+    соединения берутся из общего для потоков пула и возвращаются
+    в него вместо закрытия."""
+
+    # Соединение взято из пула, а не открыто заново (см. core.db).
+    reused_connection = False
+    # file_identity файла базы на момент открытия соединения.
+    opened_file = None
+
+    def _pool(self):
+        options = self.settings_dict.get('POOL')
+        if options is None or self.is_in_memory_db():
+            return None
+        return get_pool(str(self.settings_dict['NAME']), options)
+
+    def get_new_connection(self, conn_params):
+        pool = self._pool()
+        if pool is not None:
+            pool.acquire()
+            entry = pool.take()
+            while entry is not None and not self._is_alive(*entry):
+                entry[0].close()
+                entry = pool.take()
+            if entry is not None:
+                self.reused_connection = True
+                raw, self.opened_file = entry
+                return raw
+        self.reused_connection = False
+        try:
+            raw = super().get_new_connection(conn_params)
+        except BaseException:
+            if pool is not None:
+                pool.release()
+            raise
+        self.opened_file = file_identity(conn_params['database'])
+        return raw
+
+    def _is_alive(self, raw, opened_file) -> bool:
+        if self.is_in_memory_db():
+            return True
+        if opened_file != file_identity(self.settings_dict['NAME']):
+            return False
+        try:
+            raw.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def is_usable(self):
+        return self._is_alive(self.connection, self.opened_file)
+
+    def _close(self):
+        pool = self._pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+        raw = self.connection
+        if not self.in_atomic_block and self.is_usable():
+            try:
+                if raw.in_transaction:
+                    raw.rollback()
+            except Database.Error:
+                pass
+            else:
+                pool.release((raw, self.opened_file))
+                return
+        pool.release()
+        return super()._close()
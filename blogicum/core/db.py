@@ -0,0 +1,82 @@
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+POOLED_ENGINE = 'core.backends.sqlite3'
+
+# Счетчики соединений процесса по базам: opened - открыто новое,
+# reused - взято из пула или живое постоянное переиспользовано
+# в новом запросе, dropped - закрыто проверкой живости.
+_stats = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def count(alias: str, event: str) -> None:
+    with _stats_lock:
+        _stats[alias][event] += 1
+
+
+def connection_stats() -> dict:
+    with _stats_lock:
+        return {alias: dict(counter) for alias, counter in _stats.items()}
+
+
+def use_connection_pool() -> None:
+    """
+    Переключает базы на core.backends.sqlite3 в режим пула
+    (DATABASE_POOL) вместо постоянных соединений.
+    Для ASGI: синхронный код там выполняется в потоках исполнителя,
+    и постоянное соединение в каждом потоке - это неограниченное
+    число открытых соединений."""
+    for database in settings.DATABASES.values():
+        if database['ENGINE'] == POOLED_ENGINE:
+            database['POOL'] = settings.DATABASE_POOL
+            database['CONN_MAX_AGE'] = 0
+
+
+def apply_pragmas(cursor, pragmas: dict) -> None:
+    """
+    Выставляет PRAGMA SQLite. Имена и значения берутся только
+    из настроек, поэтому подставляются в SQL как есть."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Каждое новое соединение с SQLite получает SQLITE_PRAGMAS
+    (или PRAGMAS из настроек его базы): кеш страниц и mmap избавляют
+    ленты от лишних чтений с диска. Режим журнала сюда не входит -
+    он сохраняется в файле (см. команду sqlite_journal_mode).
+    Соединения из пула уже настроены."""
+    if getattr(connection, 'reused_connection', False):
+        count(connection.alias, 'reused')
+        return
+    count(connection.alias, 'opened')
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, connection.settings_dict.get(
+            'PRAGMAS', settings.SQLITE_PRAGMAS))
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, **kwargs):
+    """
+    Перед запросом проверяет, живы ли постоянные соединения
+    (CONN_MAX_AGE) потока, и закрывает мертвые: запрос откроет
+    новое, а не упадет на первом же SQL."""
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if connection.is_usable():
+            count(connection.alias, 'reused')
+        else:
+            connection.close()
+            count(connection.alias, 'dropped')
@@ -0,0 +1,114 @@
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def task(name: str):
+    """
+    Регистрирует функцию как фоновую задачу под именем name.
+    Аргументы задачи хранятся в JSON, поэтому передаются только
+    именованные и только простые: id, строки, числа."""
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name: str, /, **kwargs) -> Job:
+    """
+    Ставит задачу в очередь. Запись в таблице появляется
+    в текущей транзакции, а в пул потоков задача уходит только
+    после ее фиксации: иначе поток может не увидеть ни задачу,
+    ни данные, ради которых она затевалась."""
+    if name not in _tasks:
+        raise ValueError(f'Неизвестная фоновая задача: {name}')
+    job = Job.objects.create(task=name, kwargs=kwargs)
+    if settings.JOBS_WORKERS:
+        transaction.on_commit(lambda: _submit(job.pk))
+    return job
+
+
+def _submit(pk: int) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.JOBS_WORKERS,
+                thread_name_prefix='jobs')
+    _executor.submit(_run_in_thread, pk)
+
+
+def _run_in_thread(pk: int) -> None:
+    try:
+        run_job(pk)
+    finally:
+        # У каждого потока свое соединение с БД - закрываем за собой.
+        connection.close()
+
+
+def run_job(pk: int) -> bool:
+    """
+    Выполняет задачу, если ее еще никто не взял.
+    Захват - условный UPDATE, так что одну задачу не выполнят
+    дважды ни два потока, ни поток и команда run_jobs.
+    Упавшая задача возвращается в очередь, пока не кончатся
+    попытки (JOBS_MAX_ATTEMPTS)."""
+    claimed = Job.objects.filter(pk=pk, status=Job.Status.PENDING).update(
+        status=Job.Status.RUNNING,
+        started_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return False
+    job = Job.objects.get(pk=pk)
+    try:
+        _tasks[job.task](**job.kwargs)
+    except Exception:
+        logger.exception('Фоновая задача %s упала', job)
+        Job.objects.filter(pk=pk).update(
+            status=(Job.Status.PENDING
+                    if job.attempts < settings.JOBS_MAX_ATTEMPTS
+                    else Job.Status.FAILED),
+            error=traceback.format_exc(),
+        )
+        return False
+    Job.objects.filter(pk=pk).delete()
+    return True
+
+
+def run_pending() -> tuple:
+    """
+    Один проход по очереди: каждая задача, которая была
+    в очереди на момент запуска, - не больше одной попытки.
+    Возвращает (выполнено, не выполнено)."""
+    pending = list(Job.objects.filter(
+        status=Job.Status.PENDING).values_list('pk', flat=True))
+    done = 0
+    for pk in pending:
+        done += run_job(pk)
+    return done, len(pending) - done
+
+
+def requeue_stale(older_than: timedelta) -> int:
+    """
+    Возвращает в очередь задачи, которые числятся выполняющимися
+    дольше older_than: их процесс, скорее всего, умер на полпути."""
+    return Job.objects.filter(
+        status=Job.Status.RUNNING,
+        started_at__lt=timezone.now() - older_than,
+    ).update(status=Job.Status.PENDING)
@@ -0,0 +1,67 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.routers import PRIMARY
+
+
+class Command(BaseCommand):
+    help = ('Обновляет SQLite-реплики (по умолчанию все базы из '
+            'DATABASES, кроме основной) полной копией '
+            'основной базы. Копия пишется во временный файл и подменяет '
+            'реплику атомарно: читатели видят либо старую, либо новую.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Какие базы из DATABASES обновить.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, обновляя реплики раз в --interval '
+                 'секунд.')
+        parser.add_argument(
+            '--interval', type=float, default=10,
+            help='Пауза между обновлениями в режиме --loop, секунд.')
+
+    def handle(self, *args, **options):
+        primary = connections[PRIMARY]
+        aliases = options['aliases'] or [
+            alias for alias in settings.DATABASES if alias != PRIMARY]
+        for alias in aliases:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(
+                    f'{alias}: обновлять копированием можно только SQLite.')
+        while True:
+            primary.ensure_connection()
+            for alias in aliases:
+                self.copy(primary.connection,
+                          str(connections[alias].settings_dict['NAME']))
+            primary.close()
+            self.stdout.write(
+                f'Обновлено реплик: {len(aliases)}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source, path: str) -> None:
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix='.sqlite3')
+        os.close(fd)
+        try:
+            target = sqlite3.connect(temp_path)
+            try:
+                source.backup(target)
+                # Реплику подменяют целиком, так что журнал WAL рядом
+                # с ней ей не нужен: он остался бы от прежнего файла.
+                target.execute('PRAGMA journal_mode = DELETE')
+            finally:
+                target.close()
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из очереди: оставшиеся после '
+            'перезапуска, упавшие и ожидающие повторной попытки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval '
+                 'секунд.')
+        parser.add_argument(
+            '--interval', type=float, default=10,
+            help='Пауза между проходами в режиме --loop, секунд.')
+        parser.add_argument(
+            '--stale-after', type=float, default=600,
+            help='Через сколько секунд задача, которая все еще числится '
+                 'выполняющейся, считается брошенной и снова ставится '
+                 'в очередь.')
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after'])
+        while True:
+            requeued = jobs.requeue_stale(stale_after)
+            if requeued:
+                self.stdout.write(f'Возвращено в очередь: {requeued}')
+            done, failed = jobs.run_pending()
+            if done or failed:
+                self.stdout.write(
+                    f'Выполнено задач: {done}, с ошибками: {failed}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
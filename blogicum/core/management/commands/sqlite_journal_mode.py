@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.routers import PRIMARY
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+
+
+class Command(BaseCommand):
+    help = ('Переключает режим журнала SQLite-базы (по умолчанию '
+            'SQLITE_JOURNAL_MODE для основной). Режим сохраняется '
+            'в файле базы, поэтому команду достаточно выполнить один '
+            'раз при развертывании.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=PRIMARY,
+            help='Какая база из DATABASES.')
+        parser.add_argument(
+            '--mode', type=str.upper, choices=JOURNAL_MODES,
+            default=settings.SQLITE_JOURNAL_MODE,
+            help='Режим журнала.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                f'{options["database"]}: режим журнала есть только у SQLite.')
+        with connection.cursor() as cursor:
+            # PRAGMA не принимает параметров; режим - из JOURNAL_MODES.
+            cursor.execute(f'PRAGMA journal_mode = {options["mode"]}')
+            mode, = cursor.fetchone()
+        self.stdout.write(f'{options["database"]}: journal_mode = {mode}')
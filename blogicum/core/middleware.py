@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+
+from .routers import RequestState, request_state
+
+# Ключ сессии: до какого времени (time.time()) читать с основной базы.
+STICKY_SESSION_KEY = '_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaMiddleware:
+    """
+    Решает, откуда читать в запросе (см. core.routers).
+    Запросы, которые что-то меняют (POST и т.п.), читают с основной
+    базы. Если в запросе была запись, сессия на REPLICA_STICKY_SECONDS
+    закрепляется за основной базой: автор сразу видит свой пост,
+    даже если реплика еще не догнала основную базу.
+    Сессию без куки не трогаем: иначе все ответы получили бы
+    Vary: Cookie."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        has_session = settings.SESSION_COOKIE_NAME in request.COOKIES
+        pinned = request.method not in SAFE_METHODS or (
+            has_session
+            and request.session.get(STICKY_SESSION_KEY, 0) > time.time())
+        token = request_state.set(RequestState(pinned))
+        try:
+            response = self.get_response(request)
+            if request_state.get().wrote:
+                request.session[STICKY_SESSION_KEY] = (
+                    time.time() + settings.REPLICA_STICKY_SECONDS)
+        finally:
+            request_state.reset(token)
+        return response
@@ -16,3 +16,39 @@ class PublishedCreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Job(models.Model):
+    """
+    Фоновая задача из core.jobs. Хранится в БД, поэтому
+    переживает перезапуск процесса: недоделанное подберет run_jobs.
+    Успешно выполненные задачи из таблицы удаляются."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        FAILED = 'failed', 'Ошибка'
+
+    task = models.CharField('Задача', max_length=100)
+    kwargs = models.JSONField('Аргументы', default=dict, blank=True)
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    started_at = models.DateTimeField('Запущено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('id',)
+        indexes = (
+            models.Index(fields=('status', 'id'), name='job_status_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
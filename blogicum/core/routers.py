@@ -0,0 +1,71 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+# Приложения, которые всегда читают с основной базы: сессии и
+# пользователи (вход не должен зависеть от отставания реплики)
+# и очередь фоновых задач.
+PRIMARY_APPS = ('admin', 'auth', 'contenttypes', 'sessions', 'core')
+
+
+class RequestState:
+    """
+    Что роутер знает о текущем запросе: pinned - читать только
+    с основной базы, wrote - в запросе что-то записали."""
+
+    def __init__(self, pinned: bool):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Ставит core.middleware.ReplicaMiddleware. Вне запроса (команды,
+# фоновые задачи) состояния нет, и все читается с основной базы.
+request_state = ContextVar('request_state', default=None)
+
+
+@contextmanager
+def use_primary():
+    """
+    Внутри блока текущий запрос читает только с основной базы.
+    Для всего, что кладется в кеш: отстающая реплика иначе
+    закешировала бы старые данные уже под новым поколением кеша."""
+    state = request_state.get()
+    pinned = state is not None and state.pinned
+    if state is not None:
+        state.pinned = True
+    try:
+        yield
+    finally:
+        if state is not None:
+            state.pinned = pinned
+
+
+class PrimaryReplicaRouter:
+    """
+    Пишет все в основную базу, а читает в запросах - со случайной
+    из реплик DATABASE_REPLICAS, если запрос не закреплен за
+    основной базой (см. ReplicaMiddleware).
+    Реплики - копии основной базы, поэтому миграции идут только
+    на нее, а связи между объектами из разных баз разрешены."""
+
+    def db_for_read(self, model, **hints):
+        state = request_state.get()
+        if (state is None or state.pinned or not settings.DATABASE_REPLICAS
+                or model._meta.app_label in PRIMARY_APPS):
+            return PRIMARY
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = request_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == PRIMARY
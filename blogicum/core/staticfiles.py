@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils.http import http_date, parse_etags
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Что имеет смысл сжимать: картинки в PNG и прочее уже сжаты.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.json', '.xml', '.html')
+# Сжатая копия пишется, только если выигрыш больше 5%.
+MIN_COMPRESSION_RATIO = 0.95
+# (расширение сжатой копии, Content-Encoding) - в порядке предпочтения.
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def compress(data: bytes) -> dict:
+    """
+    Сжатые копии содержимого по расширениям: {'.gz': ..., '.br': ...}.
+    Brotli - если установлен одноименный пакет."""
+    compressed = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed['.br'] = brotli.compress(data)
+    return {
+        extension: content for extension, content in compressed.items()
+        if len(content) < len(data) * MIN_COMPRESSION_RATIO
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, который после collectstatic кладет
+    рядом с каждым файлом с хешем в имени его сжатые копии
+    (.gz и, если есть brotli, .br) - их отдает StaticFilesMiddleware."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            if not hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            with self.open(hashed_name) as original:
+                data = original.read()
+            for extension, content in compress(data).items():
+                name = hashed_name + extension
+                if self.exists(name):
+                    self.delete(name)
+                self.save(name, ContentFile(content))
+                yield hashed_name, name, True
+
+
+class StaticFile:
+    """
+    Собранный статический файл со всеми его сжатыми копиями,
+    прочитанными в память: {Content-Encoding или None: (байты, ETag)}."""
+
+    def __init__(self, path: str, immutable: bool):
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        self.last_modified = http_date(os.path.getmtime(path))
+        self.cache_control = (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable' if immutable
+            else f'public, max-age={settings.STATIC_CACHE_MAX_AGE}')
+        self.variants = {None: self._read(path)}
+        for extension, encoding in ENCODINGS:
+            if os.path.exists(path + extension):
+                self.variants[encoding] = self._read(path + extension)
+
+    @staticmethod
+    def _read(path: str) -> tuple:
+        with open(path, 'rb') as file:
+            data = file.read()
+        return data, f'"{hashlib.md5(data).hexdigest()}"'
+
+    def choose(self, accept_encoding: str):
+        accepted = set()
+        for token in accept_encoding.split(','):
+            coding, _, params = token.strip().partition(';')
+            if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+                accepted.add(coding.strip().lower())
+        for _, encoding in ENCODINGS:
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return None
+
+
+class StaticFilesMiddleware:
+    """
+    WSGI-обертка, которая отдает собранную статику (STATIC_ROOT)
+    из памяти, не заходя в Django: ни middleware, ни URL-ов.
+    Файлы читаются один раз при старте процесса; файлы с хешем
+    в имени (из манифеста ManifestStaticFilesStorage) кешируются
+    навсегда, остальные - на STATIC_CACHE_MAX_AGE секунд.
+    Сжатая копия отдается, если клиент ее принимает (Accept-Encoding).
+    При DEBUG (runserver) обертка включается, только если манифест
+    collectstatic свежее исходных файлов статики: иначе старый
+    STATIC_ROOT заслонял бы правки, и все уходит в приложение."""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.prefix = prefix or settings.STATIC_URL
+        root = root or settings.STATIC_ROOT
+        self.files = (
+            self._load(root) if not settings.DEBUG or self._is_current(root)
+            else {})
+
+    @staticmethod
+    def _is_current(root) -> bool:
+        """
+        Собран ли STATIC_ROOT после последней правки исходной статики."""
+        manifest_path = os.path.join(root or '', 'staticfiles.json')
+        if not root or not os.path.exists(manifest_path):
+            return False
+        collected_at = os.path.getmtime(manifest_path)
+        for finder in finders.get_finders():
+            for path, storage in finder.list([]):
+                if os.path.getmtime(storage.path(path)) > collected_at:
+                    return False
+        return True
+
+    def _load(self, root) -> dict:
+        if not root or not os.path.isdir(root):
+            return {}
+        manifest_path = os.path.join(root, 'staticfiles.json')
+        hashed = set()
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as manifest:
+                hashed = set(json.load(manifest).get('paths', {}).values())
+        compressed = tuple(extension for extension, _ in ENCODINGS)
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(compressed):
+                    continue
+                path = os.path.join(directory, filename)
+                name = posixpath.join(
+                    *os.path.relpath(path, root).split(os.sep))
+                files[self.prefix + name] = StaticFile(path, name in hashed)
+        return files
+
+    def __call__(self, environ, start_response):
+        static_file = self.files.get(environ.get('PATH_INFO', ''))
+        if static_file is None or environ['REQUEST_METHOD'] not in (
+                'GET', 'HEAD'):
+            return self.application(environ, start_response)
+
+        encoding = static_file.choose(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        data, etag = static_file.variants[encoding]
+        headers = [
+            ('Content-Type', static_file.content_type),
+            ('Cache-Control', static_file.cache_control),
+            ('Last-Modified', static_file.last_modified),
+            ('ETag', etag),
+        ]
+        if len(static_file.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding is not None:
+            headers.append(('Content-Encoding', encoding))
+        # If-None-Match - список тегов или *; сравнение слабое (W/).
+        if_none_match = parse_etags(environ.get('HTTP_IF_NONE_MATCH', ''))
+        if any(tag in ('*', etag, f'W/{etag}') for tag in if_none_match):
+            start_response('304 Not Modified', headers)
+            return []
+        headers.append(('Content-Length', str(len(data))))
+        start_response('200 OK', headers)
+        return [] if environ['REQUEST_METHOD'] == 'HEAD' else [data]
@@ -0,0 +1,157 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+from .db import connection_stats
+
+# Каталог или файл, названный хешем содержимого (blog.storage):
+# по такому URL всегда отдается одно и то же.
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{64}(\.\w+)?(/|$)')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class FileRange:
+    """
+    Кусок открытого файла как файловый объект для FileResponse."""
+
+    def __init__(self, file, start: int, length: int):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header: str, size: int):
+    """
+    Диапазон из заголовка Range в виде (начало, длина).
+    None - заголовка нет, он не разбирается (конец раньше начала
+    и т. п.) или нам не подходит (несколько диапазонов, не байты):
+    тогда по RFC 7233 заголовок игнорируется и отдается весь файл.
+    ValueError - верный диапазон за пределами файла (ответ 416)."""
+    match = RANGE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        return None
+    if not first:
+        # bytes=-N - последние N байт.
+        start = max(0, size - int(last))
+    else:
+        start = int(first)
+    end = min(int(last), size - 1) if first and last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def _range_applies(request, etag: str, last_modified: str) -> bool:
+    """
+    If-Range: диапазон отдается, только если файл не поменялся
+    с тех пор, как клиент получил его начало."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return parse_etags(if_range) == [etag]
+    return if_range == last_modified
+
+
+def _file_response(request, path: str, full_path: str, size: int,
+                   etag: str, last_modified: str) -> HttpResponse:
+    """
+    Ответ с самим файлом: через прокси, диапазоном или целиком."""
+    content_type = mimetypes.guess_type(full_path)[0] or (
+        'application/octet-stream')
+    sendfile = settings.MEDIA_SENDFILE
+    if sendfile:
+        response = HttpResponse(content_type=content_type)
+        if sendfile == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = (
+                settings.MEDIA_ACCEL_REDIRECT_PREFIX + path)
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+    try:
+        byte_range = _range_applies(request, etag, last_modified) and (
+            parse_range(request.META.get('HTTP_RANGE', ''), size))
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if not byte_range:
+        return FileResponse(open(full_path, 'rb'), content_type=content_type)
+    start, length = byte_range
+    response = FileResponse(
+        FileRange(open(full_path, 'rb'), start, length),
+        status=206, content_type=content_type)
+    response['Content-Length'] = length
+    response['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+    return response
+
+
+@require_safe
+def serve_media(request, path: str) -> HttpResponse:
+    """
+    Отдает файл из MEDIA_ROOT: с ETag и Last-Modified (ответ 304
+    на условный запрос), с поддержкой одного диапазона байт
+    (206, 416) и с долгим immutable-кешем для файлов, названных
+    по хешу содержимого.
+    MEDIA_SENDFILE = 'x-sendfile' или 'x-accel-redirect' отдает
+    сами байты на откуп фронтовому прокси (Apache, nginx):
+    вьюха только проверяет файл и ставит заголовки."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+
+    size = stat_result.st_size
+    etag = quote_etag(f'{stat_result.st_mtime_ns:x}-{size:x}')
+    last_modified = http_date(stat_result.st_mtime)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': last_modified,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+            if HASHED_NAME.search(path)
+            else f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'),
+    }
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat_result.st_mtime)
+    ) or _file_response(request, path, full_path, size, etag, last_modified)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+@staff_member_required
+@require_safe
+def db_connections(request) -> JsonResponse:
+    """
+    Счетчики соединений с базами этого процесса: сколько открыто
+    заново и сколько переиспользовано (см. core.db)."""
+    return JsonResponse(connection_stats())
@@ -33,6 +33,14 @@ class PostModelAdapter(StudentModelAdapter):
             "author",
             "category",
             "location",
+            # Header metadata filled by the image field itself. The
+            # other fields are found by unique type, and three more
+            # PositiveIntegerFields next to comment_count would make
+            # that lookup ambiguous, so these are addressed by name.
+            "image_width",
+            "image_height",
+            "image_bytes",
+            "image_mime",
             "refresh_from_db",
         ]
 
@@ -2,6 +2,7 @@ import os
 import re
 import time
 from http import HTTPStatus
+from io import BytesIO
 from inspect import getsource
 from pathlib import Path
 from typing import (
@@ -21,10 +22,12 @@ from django.apps import apps
 from django.contrib.auth import get_user_model
 from django.db.models import Model, Field
 from django.forms import BaseForm
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
+from PIL import Image
 
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
@@ -96,6 +99,35 @@ pytest_plugins = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Откат транзакции теста не шлет сигналов, поэтому кеш,
+    # заполненный в одном тесте, не должен доживать до следующего.
+    from django.core.cache import cache
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def no_job_threads(settings):
+    # Фоновые задачи в тестах выполняются явно, командой run_jobs:
+    # потоки пула пережили бы тест и его базу.
+    settings.JOBS_WORKERS = 0
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        yield tmp_path
+
+
+def make_image(name='photo.jpg', size=(800, 600),
+               color='teal') -> SimpleUploadedFile:
+    data = BytesIO()
+    Image.new('RGB', size, color).save(data, 'JPEG')
+    return SimpleUploadedFile(name, data.getvalue(), 'image/jpeg')
+
+
 @pytest.fixture
 def mixer():
     return _mixer
@@ -363,7 +395,14 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
                     os.remove(file_path)
+
+    # Подкаталоги хешей и уменьшенных копий внутри каталогов загрузки.
+    for root, dirs, files in os.walk(image_dir, topdown=False):
+        depth = len(Path(root).relative_to(image_dir).parts)
+        if depth >= 2 and not os.listdir(root):
+            os.rmdir(root)
@@ -0,0 +1,77 @@
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+from blog.paginators import EstimatedCountPaginator, estimate_row_count
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_changelist_queries_do_not_grow(
+        admin_client: Client, mixer, published_category
+):
+    mixer.cycle(3).blend('blog.Post', category=published_category)
+    with CaptureQueriesContext(connection) as few:
+        admin_client.get('/admin/blog/post/')
+    mixer.cycle(20).blend(
+        'blog.Post', category=published_category,
+        author=mixer.SELECT)
+    with CaptureQueriesContext(connection) as many:
+        response = admin_client.get('/admin/blog/post/')
+    assert response.status_code == 200
+    assert len(many) == len(few), (
+        "Убедитесь, что список постов в админке берет авторов и категории"
+        " JOIN-ом, а не запросом на каждую строку."
+    )
+
+
+def test_post_change_form_has_no_big_selects(
+        admin_client: Client, post_with_published_location
+):
+    content = admin_client.get(
+        f'/admin/blog/post/{post_with_published_location.id}/change/'
+    ).content.decode('utf-8')
+    assert 'id="id_author"' in content
+    assert '<option value="{}"'.format(
+        post_with_published_location.author_id) not in content, (
+        "Убедитесь, что автор поста в админке выбирается по id,"
+        " а не из списка всех пользователей."
+    )
+
+
+def test_estimated_count_paginator(mixer, published_category):
+    mixer.cycle(5).blend('blog.Post', category=published_category)
+    paginator_class = type(
+        'SmallLimit', (EstimatedCountPaginator,), {'count_limit': 3})
+
+    with CaptureQueriesContext(connection) as queries:
+        count = paginator_class(Post.objects.all(), 2).count
+    assert count >= 5
+    assert 'LIMIT 4' in queries[0]['sql'], (
+        "Убедитесь, что пагинатор админки не считает COUNT(*)"
+        " по всей таблице."
+    )
+    filtered = Post.objects.filter(category=published_category)
+    assert paginator_class(filtered, 2).count == 4
+
+
+def test_estimate_row_count_uses_full_index(mixer, published_category):
+    mixer.cycle(4).blend(
+        'blog.Post', category=published_category, is_published=False)
+    mixer.blend('blog.Post', category=published_category, is_published=True)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        # Строка частичного индекса - первой, как бывает после ANALYZE.
+        cursor.execute(
+            "SELECT idx, stat FROM sqlite_stat1 WHERE tbl = 'blog_post'"
+            " ORDER BY idx = 'post_published_pub_date_idx' DESC")
+        stats = cursor.fetchall()
+        cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'blog_post'")
+        cursor.executemany(
+            "INSERT INTO sqlite_stat1 VALUES ('blog_post', %s, %s)", stats)
+    assert estimate_row_count(Post.objects.all()) == 5, (
+        "Убедитесь, что оценка числа постов берется по полному индексу,"
+        " а не по частичному."
+    )
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend('blog.Comment', post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что счетчик комментариев поста увеличивается при"
+        " создании комментария."
+    )
+
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что счетчик комментариев поста уменьшается при"
+        " удалении комментария."
+    )
+
+    post.title = 'stale instance save'
+    post.comment_count = 0
+    post.save()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что сохранение поста не перезаписывает счетчик"
+        " комментариев."
+    )
+
+
+def test_rebuild_comment_counts(mixer: Mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend('blog.Comment', post=post)
+    type(post).objects.update(comment_count=0)
+    call_command('rebuild_comment_counts', stdout=io.StringIO())
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+
+def test_cascade_delete_does_not_touch_each_comment(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(50).blend('blog.Comment', post=post)
+    with CaptureQueriesContext(connection) as queries:
+        post.delete()
+    assert len(queries) < 20, (
+        "Убедитесь, что удаление поста с комментариями не обновляет"
+        " счетчик и не сбрасывает кеши на каждый комментарий."
+    )
+
+
+def test_user_delete_updates_other_posts(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    commenter = mixer.blend('auth.User')
+    mixer.cycle(3).blend('blog.Comment', post=post, author=commenter)
+    mixer.blend('blog.Comment', post=post)
+    mixer.blend('blog.Post', author=commenter)
+    commenter.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что при удалении пользователя уменьшаются счетчики"
+        " комментариев на чужих постах."
+    )
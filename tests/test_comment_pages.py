@@ -0,0 +1,43 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.views import COMMENTS_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def comment_ids(content: str):
+    return [int(x) for x in re.findall(r'name="comment_(\d+)"', content)]
+
+
+def test_comments_are_paginated_without_n_plus_one(
+        user_client: Client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_PER_PAGE + 5).blend(
+        'blog.Comment', post=post)
+    expected_ids = [comment.id for comment in comments]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(f'/posts/{post.id}/')
+    content = response.content.decode('utf-8')
+    assert comment_ids(content) == expected_ids[:COMMENTS_PER_PAGE], (
+        "Убедитесь, что на странице поста выводится первая порция каментов"
+        " «от старых к новым»."
+    )
+    comment_queries = [q for q in queries if 'blog_comment' in q['sql']]
+    assert len(comment_queries) == 1, (
+        "Убедитесь, что каменты загружаются вместе с авторами одним запросом."
+    )
+
+    more_url = re.search(
+        r'href="(/posts/\d+/comments/\?after=[\d.]+)"', content).group(1)
+    rest = user_client.get(more_url).content.decode('utf-8')
+    assert comment_ids(rest) == expected_ids[COMMENTS_PER_PAGE:], (
+        "Убедитесь, что следующая порция каментов отдается по курсору."
+    )
+    assert 'after=' not in rest
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from django.db import OperationalError, connection
+from django.test.client import Client
+
+from core.backends.sqlite3.base import DatabaseWrapper
+from core.db import connection_stats
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def make_connection(tmp_path):
+    opened = []
+
+    def make(**settings):
+        settings_dict = {
+            **connection.settings_dict,
+            'NAME': str(tmp_path / 'pool.sqlite3'),
+            'POOL': {'SIZE': 1, 'TIMEOUT': 0.1},
+            **settings,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias='pool-test')
+        opened.append(wrapper)
+        return wrapper
+
+    yield make
+    for wrapper in opened:
+        wrapper.close()
+
+
+def test_pool_reuses_and_bounds_connections(make_connection):
+    first = make_connection()
+    first.ensure_connection()
+    raw = first.connection
+    with pytest.raises(OperationalError):
+        make_connection().ensure_connection()
+
+    first.close()
+    second = make_connection()
+    second.ensure_connection()
+    assert second.connection is raw and second.reused_connection, (
+        "Убедитесь, что закрытое соединение возвращается в пул"
+        " и выдается снова, а больше POOL['SIZE'] соединений сразу"
+        " не открывается."
+    )
+    assert connection_stats()['pool-test'] == {'opened': 1, 'reused': 1}
+
+
+def test_replaced_database_file_is_not_reused(make_connection, tmp_path):
+    first = make_connection(POOL=None)
+    first.ensure_connection()
+    assert first.is_usable()
+    replacement = tmp_path / 'new.sqlite3'
+    replacement.write_bytes(b'')
+    os.replace(replacement, first.settings_dict['NAME'])
+    assert not first.is_usable(), (
+        "Убедитесь, что соединение с подмененным файлом базы"
+        " (например, обновленной репликой) считается мертвым."
+    )
+
+
+def test_connection_stats_view(admin_client: Client, client: Client):
+    response = admin_client.get('/admin/db-connections/')
+    assert response.status_code == 200
+    assert 'default' in response.json()
+    assert client.get('/admin/db-connections/').status_code == 302
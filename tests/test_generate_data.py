@@ -0,0 +1,86 @@
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db.models import F
+from django.test.client import Client
+from django.utils import timezone
+
+from blog.models import (Category, Comment, Location, Post, TimelineEntry,
+                         User)
+
+pytestmark = [pytest.mark.django_db]
+
+SMALL = ('--users', '5', '--categories', '2', '--locations', '3',
+         '--posts', '60', '--comments', '200', '--batch-size', '7',
+         '--unpublished', '0.2', '--scheduled', '0.2')
+
+
+def generate(*args):
+    call_command('generate_blog_data', *SMALL, *args, stdout=StringIO())
+
+
+def snapshot():
+    return (
+        list(Post.objects.order_by('id').values_list(
+            'title', 'author_id', 'category_id', 'is_published',
+            'pub_date')),
+        list(Comment.objects.order_by('id').values_list(
+            'post_id', 'author_id', 'created_at')),
+    )
+
+
+def test_generated_data_is_consistent(client: Client):
+    generate()
+    assert (User.objects.count(), Post.objects.count(),
+            Comment.objects.count()) == (5, 60, 200)
+    assert 0 < Post.objects.filter(is_published=False).count() < 60
+    assert 0 < Post.objects.filter(pub_date__gt=timezone.now()).count() < 60
+    assert sum(Post.objects.values_list('comment_count', flat=True)) == 200
+    visible = Post.objects.filter(
+        is_published=True, category__is_published=True,
+        pub_date__lte=timezone.now())
+    assert TimelineEntry.objects.count() == visible.count(), (
+        "Убедитесь, что после генерации данных пересчитаны счетчики"
+        " каментов и лента."
+    )
+    assert not Comment.objects.filter(
+        created_at__lt=F('post__pub_date')).exists()
+    assert Comment.objects.values('created_at').distinct().count() > 100, (
+        "Убедитесь, что у сгенерированных каментов разное время,"
+        " не раньше публикации поста."
+    )
+    assert client.login(username=User.objects.first().username,
+                        password='password')
+    assert client.get('/search/', {'q': visible.first().title}).context[
+        'page_obj'], "Убедитесь, что сгенерированные посты есть в поиске."
+
+
+def test_same_seed_same_data():
+    generate('--seed', '7', '--now', '2024-05-01T12:00:00')
+    first = snapshot()
+    for model in (User, Category, Location):
+        model.objects.all().delete()
+    generate('--seed', '7', '--now', '2024-05-01T12:00:00')
+    assert snapshot() == first, (
+        "Убедитесь, что при одних и тех же --seed и --now генерируются"
+        " одинаковые данные, включая даты."
+    )
+    anchor = timezone.make_aware(datetime(2024, 5, 1, 12), dt_timezone.utc)
+    assert not Comment.objects.filter(created_at__gt=anchor).exists(), (
+        "Убедитесь, что время каментов не позже --now."
+    )
+
+
+def test_search_index_survives_failed_generation(client: Client):
+    with mock.patch(
+        'blog.management.commands.generate_blog_data.Command.pub_date',
+        side_effect=KeyboardInterrupt,
+    ), pytest.raises(KeyboardInterrupt):
+        generate()
+    assert client.get('/search/', {'q': 'кот'}).status_code == 200, (
+        "Убедитесь, что поисковый индекс возвращается, даже если"
+        " генерация данных прервалась."
+    )
@@ -0,0 +1,49 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.test.client import Client
+
+from blog.storage import ContentHashStorage
+from conftest import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_image_metadata_stored_on_upload(
+        media_root, user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image(size=(300, 200))
+    post.save()
+    post.refresh_from_db()
+    assert (post.image_width, post.image_height, post.image_mime) == (
+        300, 200, 'image/jpeg'), (
+        "Убедитесь, что размеры и MIME-тип картинки сохраняются в пост"
+        " при загрузке."
+    )
+    assert post.image_bytes == (media_root / post.image.name).stat().st_size
+
+    with mock.patch.object(
+            ContentHashStorage, 'open', side_effect=AssertionError):
+        content = user_client.get('/').content.decode('utf-8')
+    assert 'width="300" height="200"' in content, (
+        "Убедитесь, что шаблоны берут размеры картинки из полей поста,"
+        " не открывая файл."
+    )
+
+
+def test_backfill_image_metadata_command(
+        media_root, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image(size=(120, 90))
+    post.save()
+    type(post).objects.update(
+        image_width=None, image_height=None, image_bytes=None, image_mime='')
+
+    call_command('backfill_image_metadata', stdout=StringIO())
+    post.refresh_from_db()
+    assert (post.image_width, post.image_height, post.image_mime) == (
+        120, 90, 'image/jpeg')
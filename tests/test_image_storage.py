@@ -0,0 +1,89 @@
+import hashlib
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from conftest import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def run_jobs():
+    call_command('run_jobs', stdout=StringIO())
+
+
+def test_identical_images_are_stored_once(
+        media_root, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    upload = make_image('Фото.JPG')
+    digest = hashlib.sha256(upload.read()).hexdigest()
+    upload.seek(0)
+    post.image = upload
+    post.save()
+    assert post.image.name == (
+        f'posts_pics/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+    ), (
+        "Убедитесь, что картинка поста хранится под хешем содержимого."
+    )
+
+    twin = mixer.blend('blog.Post', author=post.author,
+                       category=post.category, image=make_image('copy.jpg'))
+    assert twin.image.name == post.image.name
+    assert len(list(media_root.rglob('*.jpg'))) == 1, (
+        "Убедитесь, что одинаковые картинки хранятся одним файлом."
+    )
+
+
+def test_shared_image_is_deleted_with_last_post(
+        settings, media_root, mixer, post_with_published_location
+):
+    settings.ORPHAN_MEDIA_MIN_AGE = 0
+    post = post_with_published_location
+    post.image = make_image()
+    post.save()
+    twin = mixer.blend('blog.Post', author=post.author,
+                       category=post.category, image=make_image())
+    run_jobs()
+    twin.refresh_from_db()
+    assert twin.image_variants['variants'], (
+        "Убедитесь, что копии картинки делаются и для второго поста."
+    )
+    path = media_root / post.image.name
+    variants = [media_root / v['path']
+                for v in twin.image_variants['variants']]
+
+    post.delete()
+    run_jobs()
+    assert path.exists(), (
+        "Убедитесь, что удаление поста не удаляет картинку, которая есть"
+        " у другого поста."
+    )
+
+    twin.image = make_image(color='navy')
+    twin.save()
+    run_jobs()
+    assert not path.exists(), (
+        "Убедитесь, что картинка, на которую не осталось ссылок, удаляется."
+    )
+    assert not any(variant.exists() for variant in variants), (
+        "Убедитесь, что вместе с картинкой удаляются ее уменьшенные копии."
+    )
+
+
+def test_fresh_image_is_not_released(
+        media_root, post_with_published_location
+):
+    # Ту же картинку как раз загружают в новый пост: файлу обновили
+    # mtime, а сам пост еще не сохранен.
+    post = post_with_published_location
+    post.image = make_image()
+    post.save()
+    path = media_root / post.image.name
+    post.delete()
+    run_jobs()
+    assert path.exists(), (
+        "Убедитесь, что задача blog.release_image не удаляет файл моложе"
+        " ORPHAN_MEDIA_MIN_AGE: на него может вот-вот сослаться новый пост."
+    )
@@ -0,0 +1,62 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test.client import Client
+
+from blog.images import variant_source
+from conftest import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_variants_generated_in_background(
+        media_root, user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image()
+    post.save()
+    post.refresh_from_db()
+    assert post.image_variants_stale, (
+        "Убедитесь, что копии картинки делаются не в запросе, а фоновой"
+        " задачей."
+    )
+    content = user_client.get('/').content.decode('utf-8')
+    assert post.image.url in content and 'srcset=' not in content, (
+        "Убедитесь, что, пока копий нет, карточка показывает оригинал."
+    )
+
+    call_command('run_jobs', stdout=StringIO())
+    post.refresh_from_db()
+
+    variants = post.image_variants['variants']
+    assert {(v['width'], v['mime']) for v in variants} == {
+        (320, 'image/webp'), (320, 'image/jpeg'),
+        (640, 'image/webp'), (640, 'image/jpeg'),
+    }, (
+        "Убедитесь, что для картинки поста делаются копии всех ширин меньше"
+        " оригинала в форматах WebP и JPEG."
+    )
+    for variant in variants:
+        assert (media_root / variant['path']).exists()
+        assert variant_source(variant['path']) == post.image.name
+        assert variant['height'] == variant['width'] * 3 // 4
+
+    content = user_client.get('/').content.decode('utf-8')
+    assert 'srcset=' in content and 'width="800"' in content, (
+        "Убедитесь, что карточка поста выводит srcset и размеры картинки."
+    )
+
+
+def test_generate_image_variants_command(
+        media_root, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image(size=(200, 100))
+    post.save()
+    type(post).objects.update(image_variants={})
+
+    call_command('generate_image_variants', stdout=StringIO())
+    post.refresh_from_db()
+    assert not post.image_variants_stale
+    assert [v['width'] for v in post.image_variants['variants']] == [200, 200]
@@ -0,0 +1,60 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from core import jobs
+from core.models import Job
+
+pytestmark = [pytest.mark.django_db]
+
+calls = []
+
+
+@jobs.task('tests.flaky')
+def flaky(fail_times: int) -> None:
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('Сбой')
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+def run_jobs():
+    call_command('run_jobs', stdout=StringIO(), stderr=StringIO())
+
+
+def test_job_is_retried_and_removed_when_done(settings):
+    settings.JOBS_MAX_ATTEMPTS = 3
+    job = jobs.enqueue('tests.flaky', fail_times=1)
+    run_jobs()
+    job.refresh_from_db()
+    assert job.status == Job.Status.PENDING and 'Сбой' in job.error, (
+        "Убедитесь, что упавшая задача возвращается в очередь с текстом"
+        " ошибки."
+    )
+    run_jobs()
+    assert not Job.objects.exists(), (
+        "Убедитесь, что выполненная задача удаляется из очереди."
+    )
+    assert calls == [1, 1]
+
+
+def test_job_fails_after_max_attempts(settings):
+    settings.JOBS_MAX_ATTEMPTS = 2
+    job = jobs.enqueue('tests.flaky', fail_times=5)
+    for _ in range(3):
+        run_jobs()
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED and job.attempts == 2, (
+        "Убедитесь, что после JOBS_MAX_ATTEMPTS попыток задача помечается"
+        " как упавшая и больше не выполняется."
+    )
+
+
+def test_unknown_task_is_rejected():
+    with pytest.raises(ValueError):
+        jobs.enqueue('tests.missing')
@@ -0,0 +1,69 @@
+import pytest
+from django.test.client import Client
+
+from conftest import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def image_url(media_root, post_with_published_location):
+    post = post_with_published_location
+    post.image = make_image()
+    post.save()
+    return post.image.url, (media_root / post.image.name).read_bytes()
+
+
+def test_media_is_served_with_validators(client: Client, image_url):
+    url, data = image_url
+    response = client.get(url)
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == data
+    assert 'immutable' in response['Cache-Control'], (
+        "Убедитесь, что картинки, названные по хешу содержимого, отдаются"
+        " с долгим immutable-кешем."
+    )
+    not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert not_modified.status_code == 304, (
+        "Убедитесь, что на запрос с If-None-Match медиафайл отвечает 304."
+    )
+    assert client.get('/media/../blogicum/settings.py').status_code == 404
+
+
+def test_media_byte_ranges(client: Client, image_url):
+    url, data = image_url
+    response = client.get(url, HTTP_RANGE='bytes=10-19')
+    assert response.status_code == 206
+    assert b''.join(response.streaming_content) == data[10:20]
+    assert response['Content-Range'] == f'bytes 10-19/{len(data)}'
+
+    response = client.get(url, HTTP_RANGE='bytes=-5')
+    assert b''.join(response.streaming_content) == data[-5:]
+
+    response = client.get(url, HTTP_RANGE=f'bytes={len(data)}-')
+    assert response.status_code == 416, (
+        "Убедитесь, что диапазон за концом файла дает ответ 416."
+    )
+    for malformed in ('bytes=19-10', 'bytes=abc', 'items=0-9'):
+        response = client.get(url, HTTP_RANGE=malformed)
+        assert response.status_code == 200, (
+            "Убедитесь, что неразборчивый заголовок Range игнорируется"
+            " и отдается весь файл."
+        )
+    response = client.get(
+        url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+    assert response.status_code == 200, (
+        "Убедитесь, что при несовпадающем If-Range отдается весь файл."
+    )
+
+
+def test_media_accel_redirect(settings, client: Client, image_url):
+    settings.MEDIA_SENDFILE = 'x-accel-redirect'
+    url, _ = image_url
+    response = client.get(url)
+    assert response['X-Accel-Redirect'] == (
+        '/protected-media/' + url[len('/media/'):]
+    ), (
+        "Убедитесь, что в режиме MEDIA_SENDFILE байты отдает прокси."
+    )
+    assert not response.content
@@ -0,0 +1,65 @@
+import os
+import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.images import variant_name
+from conftest import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_file(path, age=7200):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'orphan')
+    past = time.time() - age
+    os.utime(path, (past, past))
+    return path
+
+
+def collect(*args) -> str:
+    out = StringIO()
+    call_command('collect_orphan_media', *args, stdout=out)
+    return out.getvalue()
+
+
+def test_orphans_collected(media_root, post_with_published_location):
+    post = post_with_published_location
+    post.image = make_image()
+    post.save()
+    kept = [
+        make_file(media_root / post.image.name),
+        make_file(media_root / variant_name(post.image.name, 320, 'webp')),
+    ]
+    orphan = make_file(media_root / 'posts_pics/ab/cd/abcd.jpg')
+    orphan_variant = make_file(
+        media_root / variant_name('posts_pics/ab/cd/abcd.jpg', 320, 'webp'))
+    fresh = make_file(media_root / 'posts_pics/ef/01/ef01.jpg', age=0)
+
+    report = collect('--dry-run')
+    assert 'posts_pics/ab/cd/abcd.jpg' in report and orphan.exists(), (
+        "Убедитесь, что --dry-run только перечисляет ненужные файлы."
+    )
+
+    collect()
+    assert not orphan.exists() and not orphan_variant.exists(), (
+        "Убедитесь, что файлы без ссылок из постов удаляются вместе"
+        " с уменьшенными копиями."
+    )
+    assert not (media_root / 'posts_pics/ab').exists()
+    assert all(path.exists() for path in kept), (
+        "Убедитесь, что картинки постов и их копии не удаляются."
+    )
+    assert fresh.exists(), (
+        "Убедитесь, что файлы моложе --min-age не трогаются."
+    )
+
+
+def test_orphans_quarantined(media_root, tmp_path_factory):
+    quarantine = tmp_path_factory.mktemp('quarantine')
+    orphan = make_file(media_root / 'posts_pics/ab/cd/abcd.jpg')
+    collect('--quarantine', str(quarantine), '--batch-size', '1')
+    assert not orphan.exists()
+    assert (quarantine / 'posts_pics/ab/cd/abcd.jpg').exists()
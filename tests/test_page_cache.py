@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_pages_are_cached(
+        client: Client, user_client: Client, post_with_published_location
+):
+    client.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/')
+    assert response.status_code == 200
+    assert not queries, (
+        "Убедитесь, что главная страница для анонимов отдается из кеша"
+        " без запросов к БД."
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get('/')
+    assert queries, "Убедитесь, что залогиненные идут мимо кеша страниц."
+
+
+def test_page_cache_invalidated_by_signals(
+        client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    client.get('/')
+    post.title = 'Заголовок после правки'
+    post.save()
+    assert post.title in client.get('/').content.decode('utf-8'), (
+        "Убедитесь, что правка поста сбрасывает кеш страниц."
+    )
+
+
+def test_scheduled_post_appears_on_time(
+        client: Client, mixer, user, published_category
+):
+    pub_date = timezone.now() + timedelta(hours=1)
+    mixer.blend('blog.Post', author=user, category=published_category,
+                title='Отложенный пост', pub_date=pub_date)
+    assert 'Отложенный пост' not in client.get('/').content.decode('utf-8')
+
+    later = pub_date + timedelta(seconds=1)
+    with mock.patch('django.utils.timezone.now', return_value=later):
+        call_command('publish_scheduled_posts', stdout=StringIO())
+        content = client.get('/').content.decode('utf-8')
+    assert 'Отложенный пост' in content, (
+        "Убедитесь, что отложенный пост появляется в закешированной ленте,"
+        " как только наступает время его публикации и его добавляет"
+        " в ленту команда publish_scheduled_posts."
+    )
+
+
+def test_deploy_check_requires_shared_cache(settings):
+    from blog.checks import check_shared_cache
+
+    assert [w.id for w in check_shared_cache(None)] == ['blog.W001'], (
+        "Убедитесь, что check --deploy предупреждает о кеше, который"
+        " свой у каждого процесса."
+    )
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/blogicum-cache',
+    }}
+    assert check_shared_cache(None) == []
@@ -0,0 +1,132 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _pub_dates(response):
+    return [(post.pub_date, post.id) for post in response.context['page_obj']]
+
+
+def test_cursor_pagination_matches_page_mode(
+        client: Client, many_posts_with_published_locations
+):
+    first = client.get('/')
+    next_cursor = first.context['page_obj'].next_cursor
+    assert next_cursor, (
+        "Убедитесь, что на первой странице ленты есть курсор следующей"
+        " страницы."
+    )
+    by_cursor = client.get(f'/?after={next_cursor}')
+    by_page = client.get('/?page=2')
+    assert _pub_dates(by_cursor) == _pub_dates(by_page), (
+        "Убедитесь, что страница по курсору ?after= совпадает с"
+        " соответствующей страницей ?page=."
+    )
+    assert by_cursor.context['page_obj'].has_previous()
+
+    back = client.get(
+        f"/?before={by_cursor.context['page_obj'].previous_cursor}")
+    assert _pub_dates(back) == _pub_dates(first)[:N_PER_PAGE], (
+        "Убедитесь, что курсор ?before= возвращает предыдущую страницу."
+    )
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    ['garbage', '999999999999999999999.1', '1.99999999999999999999999',
+     '1.-5'],
+)
+def test_invalid_cursor_is_404(client: Client, cursor):
+    assert client.get(f'/?after={cursor}').status_code == 404
+    assert client.get(f'/?before={cursor}').status_code == 404
+
+
+def test_invalid_comments_cursor_is_404(
+        client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    response = client.get(
+        f'/posts/{post.id}/comments/?after=999999999999999999999.1')
+    assert response.status_code == 404
+
+
+def test_feed_count_is_cached(
+        client: Client, mixer, many_posts_with_published_locations
+):
+    client.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/?page=2')
+    assert not [q for q in queries if 'COUNT(' in q['sql']], (
+        "Убедитесь, что число постов в ленте берется из кеша."
+    )
+    num_pages = response.context['page_obj'].paginator.num_pages
+
+    post = many_posts_with_published_locations[0]
+    mixer.cycle(N_PER_PAGE).blend(
+        'blog.Post', author=post.author, category=post.category)
+    response = client.get('/')
+    assert response.context['page_obj'].paginator.num_pages > num_pages, (
+        "Убедитесь, что новый пост сбрасывает закешированное число постов."
+    )
+
+
+def test_page_links_are_elided(client: Client, mixer, published_category):
+    mixer.cycle(N_PER_PAGE * 12).blend(
+        'blog.Post', category=published_category)
+    content = client.get('/?page=6').content.decode('utf-8')
+    page_links = set(re.findall(r'\?page=(\d+)', content))
+    assert page_links == {'1', '4', '5', '7', '8', '12'}, (
+        "Убедитесь, что пагинатор выводит только первую, последнюю и"
+        " соседние с текущей страницы."
+    )
+    assert '…' in content
+
+
+def test_paginate_mixin_without_count_key(rf, mixer, published_category):
+    from django.views.generic import ListView
+
+    from blog.models import Post
+    from blog.views import PaginateMixin
+
+    class View(PaginateMixin, ListView):
+        model = Post
+
+    mixer.cycle(3).blend('blog.Post', category=published_category)
+    view = View()
+    view.setup(rf.get('/'))
+    paginator = view.get_paginator(Post.objects.order_by('id'), 2)
+    assert paginator.count == 3, (
+        "Убедитесь, что миксин пагинирования работает без"
+        " get_count_key() - считает записи без кеша."
+    )
+
+
+def test_stale_cached_count_is_recounted(
+        client: Client, many_posts_with_published_locations
+):
+    from django.core.cache import cache
+
+    from blog.paginators import CachedCountPaginator
+
+    client.get('/')
+    paginator = CachedCountPaginator([], N_PER_PAGE, count_key='index')
+    key = paginator.count_cache_key()
+    real_count = cache.get(key)
+    cache.set(key, real_count + N_PER_PAGE * 3)
+    num_pages = -(-(real_count + N_PER_PAGE * 3) // N_PER_PAGE)
+
+    response = client.get(f'/?page={num_pages}')
+    assert response.status_code == 404, (
+        "Убедитесь, что страница за пределами ленты при устаревшем"
+        " числе постов в кеше дает 404, а не ошибку."
+    )
+    assert cache.get(key) == real_count, (
+        "Убедитесь, что устаревшее число постов в кеше пересчитывается."
+    )
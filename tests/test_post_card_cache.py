@@ -0,0 +1,34 @@
+import pytest
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test.client import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+def card_key(post):
+    post.refresh_from_db()
+    return make_template_fragment_key(
+        'post_card', [post.id, post.card_version])
+
+
+def test_post_card_is_cached_per_version(
+        user_client: Client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get('/')
+    assert cache.get(card_key(post)) is not None, (
+        "Убедитесь, что HTML карточки поста кешируется."
+    )
+
+    mixer.blend('blog.Comment', post=post)
+    assert '(1)' in user_client.get('/').content.decode('utf-8'), (
+        "Убедитесь, что новый камент меняет ключ кеша карточки поста."
+    )
+
+    post.category.title = 'Переименованная категория'
+    post.category.save()
+    content = user_client.get('/').content.decode('utf-8')
+    assert 'Переименованная категория' in content, (
+        "Убедитесь, что правка категории меняет ключ кеша карточки поста."
+    )
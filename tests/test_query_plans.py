@@ -0,0 +1,115 @@
+import re
+import time
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import views
+from blog.lookups import categories
+from blog.models import Category
+from blog.paginators import CursorPaginator, encode_cursor
+
+pytestmark = [pytest.mark.django_db]
+
+# Полный проход по таблице или сортировка во временном B-дереве.
+BAD_PLAN_STEP = re.compile(r'^SCAN |TEMP B-TREE')
+# Проход по индексу в порядке сортировки: с LIMIT он останавливается
+# на первых строках, так что для первой страницы это не полный проход.
+ORDERED_SCAN = re.compile(r'^SCAN \S+ USING (COVERING )?INDEX ')
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_indexed(queryset, what, first_page=False):
+    plan = query_plan(queryset)
+    if first_page:
+        assert queryset.query.high_mark is not None
+    bad_steps = [
+        step for step in plan
+        if BAD_PLAN_STEP.search(step)
+        and not (first_page and ORDERED_SCAN.search(step))]
+    assert not bad_steps, (
+        f"Убедитесь, что запрос {what} обслуживается индексом без полного"
+        f" сканирования и сортировки во временном B-дереве. План: {plan}"
+    )
+
+
+@pytest.mark.parametrize(
+    ('view_class', 'kwargs'),
+    [
+        (views.IndexView, {}),
+        (views.CategoryView, {'category_slug': 'plan-category'}),
+        (views.UserDetailView, {'username': 'plan-user'}),
+    ],
+    ids=['index', 'category', 'profile'],
+)
+def test_feed_query_plans(mixer, view_class, kwargs):
+    author = mixer.blend('auth.User', username='plan-user')
+    category = mixer.blend(
+        'blog.Category', slug='plan-category', is_published=True)
+    mixer.blend('blog.Post', author=author, category=category,
+                is_published=True, pub_date=timezone.now())
+
+    view = view_class()
+    view.setup(RequestFactory().get('/'), **kwargs)
+    queryset = view.get_queryset()
+    name = view_class.__name__
+
+    assert_indexed(queryset[:views.PAGINATE_BY_THIS],
+                   f'первой страницы {name}', first_page=True)
+
+    paginator = CursorPaginator(
+        queryset, views.PAGINATE_BY_THIS, view.cursor_fields)
+    cursor = encode_cursor(queryset.first(), view.cursor_fields)
+    for direction, bound in (('after', 'pub_date<?'),
+                             ('before', 'pub_date>?')):
+        page_queryset = paginator.page_queryset(**{direction: cursor})
+        what = f'курсорной страницы {name} ({direction}=...)'
+        assert_indexed(page_queryset, what)
+        assert any(bound in step for step in query_plan(page_queryset)), (
+            f"Убедитесь, что запрос {what} берет по индексу диапазон дат"
+            f" ({bound}), а не проходит все записи по ту сторону курсора."
+        )
+
+
+def test_comment_query_plan(post_with_published_location):
+    assert_indexed(
+        post_with_published_location.comments.order_by('created_at'),
+        'каментов к посту')
+
+
+def test_feed_takes_categories_and_locations_from_memory(
+        user_client, many_posts_with_published_locations
+):
+    user_client.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get('/?page=2')
+    selects = [q['sql'] for q in queries if 'blog_post' in q['sql']]
+    assert len(selects) == 1 and 'blog_location' not in selects[0], (
+        "Убедитесь, что категории и локации постов ленты берутся из"
+        " таблиц в памяти процесса, а не JOIN-ом и не отдельными запросами."
+    )
+
+
+def test_lookup_tables_expire(settings, published_category):
+    # update() не шлет сигналов - как правка из другого процесса
+    # при кеше, который у каждого процесса свой.
+    categories.get(published_category.id)
+    Category.objects.filter(id=published_category.id).update(title='Новое')
+    assert categories.get(published_category.id).title != 'Новое'
+
+    later = time.monotonic() + settings.LOOKUP_MAX_AGE
+    with mock.patch('time.monotonic', return_value=later):
+        assert categories.get(published_category.id).title == 'Новое', (
+            "Убедитесь, что копия категорий в памяти процесса"
+            " перечитывается не реже раза в LOOKUP_MAX_AGE секунд."
+        )
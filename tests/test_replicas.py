@@ -0,0 +1,66 @@
+import pytest
+from django.db import connections
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+from core.routers import PrimaryReplicaRouter, RequestState, request_state
+
+pytestmark = [pytest.mark.django_db(databases=['default', 'replica'])]
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+
+
+def test_router_reads_from_replica_only_in_requests(replicas):
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Post) == 'default', (
+        "Убедитесь, что вне запроса (команды, задачи) чтение идет"
+        " с основной базы."
+    )
+    token = request_state.set(RequestState(pinned=False))
+    try:
+        assert router.db_for_read(Post) == 'replica'
+        assert router.db_for_write(Post) == 'default'
+        assert request_state.get().wrote
+    finally:
+        request_state.reset(token)
+    assert not router.allow_migrate('replica', 'blog')
+
+
+# Реплика в тестах - зеркало основной базы, и свои данные она видит
+# только после коммита, поэтому без обертки тестов в транзакцию.
+@pytest.mark.django_db(databases=['default', 'replica'], transaction=True)
+def test_sticky_primary_after_write(
+        replicas, user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    with CaptureQueriesContext(connections['replica']) as queries:
+        user_client.get(f'/posts/{post.id}/')
+    assert queries, (
+        "Убедитесь, что страница поста читается с реплики."
+    )
+
+    user_client.post(f'/posts/{post.id}/comment/', {'text': 'Камент'})
+    with CaptureQueriesContext(connections['replica']) as queries:
+        user_client.get(f'/posts/{post.id}/')
+    assert not queries, (
+        "Убедитесь, что после записи сессия некоторое время читает"
+        " только с основной базы."
+    )
+
+
+@pytest.mark.django_db(databases=['default', 'replica'], transaction=True)
+def test_cached_pages_are_read_from_primary(
+        replicas, client: Client, post_with_published_location
+):
+    with CaptureQueriesContext(connections['replica']) as queries:
+        response = client.get('/')
+    assert response.status_code == 200
+    assert not queries, (
+        "Убедитесь, что страницы, которые кладутся в кеш (а с ними"
+        " счетчики лент и копии категорий и локаций), читаются с основной"
+        " базы: отставшая реплика закешировала бы старые данные."
+    )
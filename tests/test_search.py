@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.search import match_expression
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _titles(response):
+    return [post.title for post in response.context['page_obj']]
+
+
+@pytest.fixture
+def searchable_posts(mixer, user, published_category):
+    def blend(title, text='', **kwargs):
+        kwargs = {'is_published': True,
+                  'pub_date': timezone.now() - timedelta(days=1),
+                  **kwargs}
+        return mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            title=title, text=text, **kwargs)
+
+    return {
+        'title': blend('Пирожки с капустой', 'Рецепт.'),
+        'text': blend('Выходные', 'Пекли пирожки всей семьей.'),
+        'other': blend('Про котов', 'Кот спит.'),
+        'hidden': blend('Пирожки в черновике', is_published=False),
+        'future': blend('Пирожки завтра',
+                        pub_date=timezone.now() + timedelta(days=1)),
+    }
+
+
+def test_search_ranks_visible_posts(client: Client, searchable_posts):
+    response = client.get('/search/', {'q': 'пирожк'})
+    assert _titles(response) == ['Пирожки с капустой', 'Выходные'], (
+        "Убедитесь, что поиск находит по префиксу слова только видимые"
+        " всем посты, а совпадение в заголовке ставит выше совпадения"
+        " в тексте."
+    )
+
+
+def test_search_index_follows_edits(client: Client, searchable_posts):
+    post = searchable_posts['other']
+    post.text = 'Кот съел пирожки.'
+    post.save()
+    searchable_posts['title'].delete()
+    assert sorted(_titles(client.get('/search/', {'q': 'пирожки'}))) == [
+        'Выходные', 'Про котов'], (
+        "Убедитесь, что правка и удаление поста сразу видны в поиске."
+    )
+
+
+def test_search_query_is_not_fts_syntax(client: Client, searchable_posts):
+    assert match_expression('"кот" OR* (') == '"кот"* "OR"*'
+    assert client.get('/search/', {'q': '*"('}).status_code == 200
+
+
+def test_search_uses_fts_index(client: Client, searchable_posts):
+    with CaptureQueriesContext(connection) as queries:
+        client.get('/search/', {'q': 'кот'})
+    sql = ' '.join(q['sql'] for q in queries)
+    assert 'MATCH' in sql and 'LIKE' not in sql
+
+
+def test_admin_search_uses_fts_index(admin_client: Client, searchable_posts):
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get('/admin/blog/post/', {'q': 'пирожки'})
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 4
+    sql = ' '.join(q['sql'] for q in queries)
+    assert 'MATCH' in sql and 'LIKE' not in sql, (
+        "Убедитесь, что поиск в админке идет по полнотекстовому индексу,"
+        " а не LIKE по полям постов."
+    )
+
+
+def test_admin_filters_posts_without_search(
+        admin_client: Client, user, mixer, searchable_posts):
+    location = mixer.blend('blog.Location', is_published=True)
+    post = searchable_posts['other']
+    post.location = location
+    post.save()
+    for params in ({'location__id__exact': location.id},
+                   {'author': user.id},
+                   {'pub_date__year': post.pub_date.year}):
+        response = admin_client.get('/admin/blog/post/', params)
+        assert response.status_code == 200
+        assert post in response.context['cl'].result_list, (
+            "Убедитесь, что посты в админке фильтруются по месту, автору"
+            " и дате без поиска LIKE."
+        )
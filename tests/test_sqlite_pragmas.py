@@ -0,0 +1,40 @@
+import pytest
+from django.db import connection, connections
+
+pytestmark = [pytest.mark.django_db]
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+def test_sqlite_pragmas_applied(settings):
+    expected = {
+        'synchronous': 1,  # NORMAL
+        'temp_store': 2,  # MEMORY
+        'cache_size': settings.SQLITE_PRAGMAS['cache_size'],
+        'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'],
+    }
+    actual = {name: pragma(name) for name in expected}
+    assert actual == expected, (
+        "Убедитесь, что каждое соединение с SQLite получает PRAGMA"
+        " из SQLITE_PRAGMAS."
+    )
+
+
+def test_connections_keep_journal_mode(tmp_path):
+    path = tmp_path / 'journal.sqlite3'
+    fresh = type(connections['default'])(
+        {**connection.settings_dict, 'NAME': str(path)}, 'default')
+    try:
+        with fresh.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            mode, = cursor.fetchone()
+    finally:
+        fresh.close()
+    assert mode == 'delete', (
+        "Убедитесь, что соединение не переключает файл базы в WAL:"
+        " режим журнала меняет только команда sqlite_journal_mode."
+    )
@@ -0,0 +1,99 @@
+import gzip
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from core.staticfiles import StaticFilesMiddleware
+
+
+@pytest.fixture(scope='module')
+def static_root(tmp_path_factory):
+    root = tmp_path_factory.mktemp('static')
+    with override_settings(
+            STATIC_ROOT=root,
+            STATICFILES_STORAGE=(
+                'core.staticfiles.CompressedManifestStaticFilesStorage'),
+    ):
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+    return root
+
+
+def fallback(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'django']
+
+
+def request(app, path, **environ):
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **environ}
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = status
+        response['headers'] = dict(headers)
+
+    response['body'] = b''.join(app(environ, start_response))
+    return response
+
+
+def test_hashed_static_served_compressed(static_root):
+    hashed = next((static_root / 'css').glob('bootstrap.min.*.css'))
+    original = hashed.read_bytes()
+    app = StaticFilesMiddleware(fallback, root=static_root, prefix='/static/')
+    path = f'/static/css/{hashed.name}'
+
+    response = request(app, path, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response['headers'].get('Content-Encoding') == 'gzip', (
+        "Убедитесь, что статика отдается в заранее сжатой копии, если"
+        " клиент ее принимает."
+    )
+    assert gzip.decompress(response['body']) == original
+    assert 'immutable' in response['headers']['Cache-Control']
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+
+    plain = request(app, path, HTTP_ACCEPT_ENCODING='gzip;q=0')
+    assert plain['body'] == original
+    assert 'Content-Encoding' not in plain['headers']
+
+    cached = request(
+        app, path, HTTP_IF_NONE_MATCH=plain['headers']['ETag'])
+    assert cached['status'].startswith('304')
+
+    unhashed = request(app, '/static/css/bootstrap.min.css')
+    assert 'immutable' not in unhashed['headers']['Cache-Control']
+    assert request(app, '/static/missing.css')['body'] == b'django'
+
+
+def test_if_none_match_is_parsed(static_root):
+    app = StaticFilesMiddleware(fallback, root=static_root, prefix='/static/')
+    path = '/static/css/bootstrap.min.css'
+    etag = request(app, path)['headers']['ETag']
+    for header, status in ((f'"other", W/{etag}', '304'), ('*', '304'),
+                           (f'"x{etag[1:-1]}"', '200'), ('garbage', '200')):
+        response = request(app, path, HTTP_IF_NONE_MATCH=header)
+        assert response['status'].startswith(status), (
+            "Убедитесь, что If-None-Match разбирается как список ETag,"
+            " а не проверяется подстрокой."
+        )
+
+
+def test_stale_static_root_is_ignored_in_debug(static_root, settings):
+    settings.DEBUG = True
+    app = StaticFilesMiddleware(fallback, root=static_root, prefix='/static/')
+    assert app.files, (
+        "Убедитесь, что при DEBUG свежесобранная статика отдается."
+    )
+    manifest = static_root / 'staticfiles.json'
+    stat = manifest.stat()
+    os.utime(manifest, (0, 0))
+    try:
+        app = StaticFilesMiddleware(
+            fallback, root=static_root, prefix='/static/')
+    finally:
+        os.utime(manifest, (stat.st_atime, stat.st_mtime))
+    assert not app.files, (
+        "Убедитесь, что при DEBUG устаревший STATIC_ROOT не заслоняет"
+        " исходные файлы статики."
+    )
@@ -0,0 +1,37 @@
+import pytest
+from django.test.client import Client
+
+from blog.models import TimelineEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_timeline_follows_post_and_category_edits(
+        user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    assert TimelineEntry.objects.filter(post=post).exists(), (
+        "Убедитесь, что опубликованный пост сразу попадает в ленту."
+    )
+
+    post.category.is_published = False
+    post.category.save()
+    assert not TimelineEntry.objects.filter(post=post).exists(), (
+        "Убедитесь, что снятие категории с публикации убирает ее посты"
+        " из ленты."
+    )
+    assert not user_client.get('/').context['page_obj']
+
+    post.category.is_published = True
+    post.category.save()
+    post.is_published = False
+    post.save()
+    assert not TimelineEntry.objects.filter(post=post).exists(), (
+        "Убедитесь, что снятый с публикации пост пропадает из ленты."
+    )
+
+    post.is_published = True
+    post.save()
+    assert TimelineEntry.objects.rebuild() == 1
+    assert [p.id for p in user_client.get('/').context['page_obj']] == [
+        post.id]
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test.client import Client
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post, TimelineEntry, User
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_export_import_round_trip(
+        tmp_path, client: Client, mixer, post_with_published_location
+):
+    mixer.cycle(2).blend('blog.Comment', post=post_with_published_location)
+    # Даты из прошлого: после загрузки они не должны стать «сейчас».
+    past = timezone.now() - timedelta(days=400)
+    Comment.objects.update(created_at=past)
+    Post.objects.update(created_at=past, updated_at=past)
+    Category.objects.update(created_at=past)
+
+    def timestamps():
+        return (
+            sorted(Comment.objects.values_list('id', 'created_at')),
+            sorted(Post.objects.values_list(
+                'id', 'created_at', 'updated_at')),
+            sorted(Category.objects.values_list('id', 'created_at')),
+        )
+
+    before = timestamps()
+    dump = tmp_path / 'blog.jsonl.gz'
+    call_command('blog_export', str(dump), '--chunk-size', '1',
+                 stderr=StringIO())
+    post_ids = sorted(Post.objects.values_list('id', flat=True))
+    user_count = User.objects.count()
+    for model in (User, Category, Location):
+        model.objects.all().delete()
+    assert not Post.objects.exists()
+
+    call_command('blog_import', str(dump), '--chunk-size', '2',
+                 stdout=StringIO())
+    assert sorted(Post.objects.values_list('id', flat=True)) == post_ids
+    assert User.objects.count() == user_count
+    assert timestamps() == before, (
+        "Убедитесь, что blog_import сохраняет даты создания и изменения"
+        " из выгрузки, а не ставит время загрузки."
+    )
+    post = Post.objects.get(id=post_with_published_location.id)
+    assert post.comment_count == Comment.objects.filter(post=post).count()
+    assert TimelineEntry.objects.filter(
+        post=post_with_published_location).exists(), (
+        "Убедитесь, что после blog_import пересчитаны счетчики каментов"
+        " и лента."
+    )
+    assert post_with_published_location.title in client.get(
+        '/').content.decode('utf-8')
+
+
+def test_import_checks_foreign_keys(tmp_path, post_with_published_location):
+    dump = tmp_path / 'blog.jsonl'
+    call_command('blog_export', str(dump), stderr=StringIO())
+    posts_only = [line for line in dump.read_text().splitlines()
+                  if '"blog.post"' in line]
+    dump.write_text('\n'.join(posts_only))
+    User.objects.all().delete()
+
+    with pytest.raises(CommandError):
+        call_command('blog_import', str(dump), stdout=StringIO())
+    assert not Post.objects.exists(), (
+        "Убедитесь, что выгрузка с битыми ссылками не загружается"
+        " и не оставляет в базе половину объектов."
+    )
+
+
+def test_export_to_command_stdout(mixer, post_with_published_location):
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    out = StringIO()
+    call_command('blog_export', stdout=out, stderr=StringIO())
+    lines = out.getvalue().splitlines()
+    assert any('"blog.comment"' in line for line in lines), (
+        "Убедитесь, что blog_export без файла пишет в stdout команды."
+    )
@@ -0,0 +1,59 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.client import Client
+
+from conftest import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def post_data(published_category, image) -> dict:
+    return {
+        'title': 'Пост с картинкой',
+        'text': 'Текст',
+        'category': published_category.id,
+        'pub_date': '2030-01-01 00:00',
+        'image': image,
+    }
+
+
+def test_non_image_upload_is_rejected(
+        media_root, user_client: Client, published_category
+):
+    fake = SimpleUploadedFile('photo.jpg', b'#!/bin/sh\n' * 100, 'image/jpeg')
+    response = user_client.post(
+        '/posts/create/', post_data(published_category, fake))
+    assert response.status_code == 200
+    assert 'JPEG, PNG, GIF или WebP' in response.content.decode('utf-8'), (
+        "Убедитесь, что файл, который по первым байтам не похож на"
+        " картинку, отбрасывается при загрузке с ошибкой в форме."
+    )
+    assert not list(media_root.rglob('*.*'))
+
+
+def test_oversized_upload_is_rejected(
+        settings, media_root, user_client: Client, published_category
+):
+    settings.POST_IMAGE_MAX_UPLOAD_SIZE = 1024
+    image = make_image(size=(400, 400))
+    response = user_client.post(
+        '/posts/create/', post_data(published_category, image))
+    assert 'не больше 1,0' in response.content.decode('utf-8'), (
+        "Убедитесь, что картинка больше POST_IMAGE_MAX_UPLOAD_SIZE"
+        " отбрасывается при загрузке с ошибкой в форме."
+    )
+
+    settings.POST_IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+    response = user_client.post(
+        '/posts/create/', post_data(published_category, make_image()))
+    assert response.status_code == 302
+
+
+def test_upload_views_still_check_csrf(user, published_category):
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(user)
+    response = client.post(
+        '/posts/create/', post_data(published_category, make_image()))
+    assert response.status_code == 403, (
+        "Убедитесь, что страницы создания и правки поста проверяют CSRF."
+    )